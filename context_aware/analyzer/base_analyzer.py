@@ -56,7 +56,12 @@ class BaseAnalyzer(ABC):
         pass
 
     @abstractmethod
-    def extract_code_by_symbol(self, file_path: str, symbol_name: str) -> Optional[str]:
+    def extract_code_by_symbol(
+        self,
+        file_path: str,
+        symbol_name: str,
+        line_number: Optional[int] = None
+    ) -> Optional[str]:
         """
         Extract the complete source code for a specific symbol.
 
@@ -66,6 +71,8 @@ class BaseAnalyzer(ABC):
         Args:
             file_path: Absolute path to the source file
             symbol_name: Name of the symbol to extract (e.g., "UserService")
+            line_number: Indexed start line of the symbol (1-indexed), if known.
+                A hint only: implementations fall back to searching the file.
 
         Returns:
             The full source code of the symbol (including body), or None if
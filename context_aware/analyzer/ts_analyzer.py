@@ -14,13 +14,18 @@ Architecture:
     4. Each symbol becomes a ContextItem stored in SQLite for later search
 
 Usage:
-    analyzer = TreeSitterAnalyzer("python")
-    items = analyzer.analyze_file("/path/to/file.py")
+    analyzer = TreeSitterAnalyzer.for_language(get_language_for_file(path))
+    items = analyzer.analyze_file(path)
+
+for_language() shares one analyzer (parser and compiled query) per language
+across the process; construct TreeSitterAnalyzer directly only for a private one.
 """
 import logging
 import os
 import re
-from typing import List, Optional, Set, Dict, Pattern
+import sys
+from collections import OrderedDict
+from typing import List, Optional, Set, Dict, Pattern, Tuple
 
 from tree_sitter import Parser
 import tree_sitter_languages
@@ -37,6 +42,56 @@ _JS_IMPORT_PATTERN: Pattern = re.compile(r"from\s+['\"]([^'\"]+)['\"]|^import\s+
 # Pre-compiled regex for Go imports: matches quoted strings in import declarations
 _GO_IMPORT_PATTERN: Pattern = re.compile(r'"([^"]+)"')
 
+# Pre-compiled regex for identifier tokens: used to find symbol references in a body
+_IDENTIFIER_PATTERN: Pattern = re.compile(r'\w+')
+
+# Tree-sitter S-expression queries for each language.
+# These queries capture:
+#   @name  - The identifier node (used to get the symbol name)
+#   @class/@function/@import - The full definition node (used for context)
+#
+# Every @name capture must sit inside a @class/@function capture in the same
+# pattern: the analyzer pairs each name with the definition captured before it.
+#
+# Note: TypeScript interfaces are treated as "class" for simplicity.
+# Note: Arrow functions assigned to variables are captured as functions.
+_QUERIES: Dict[str, str] = {
+    "python": """
+        (class_definition name: (identifier) @name) @class
+        (function_definition name: (identifier) @name) @function
+        (import_statement) @import
+        (import_from_statement) @import
+    """,
+    "javascript": """
+        (class_declaration name: (identifier) @name) @class
+        (function_declaration name: (identifier) @name) @function
+        (variable_declarator
+            name: (identifier) @name
+            value: [(arrow_function) (function_expression)]
+        ) @function
+        (import_statement source: (string) @import_source) @import
+    """,
+    "typescript": """
+        (class_declaration name: (identifier) @name) @class
+        (interface_declaration name: (type_identifier) @name) @class
+        (function_declaration name: (identifier) @name) @function
+        (variable_declarator
+            name: (identifier) @name
+            value: [(arrow_function) (function_expression)]
+        ) @function
+        (import_statement source: (string) @import_source) @import
+    """,
+    "go": """
+        (type_declaration spec: (type_spec name: (type_identifier) @name)) @class
+        (function_declaration name: (identifier) @name) @function
+        (method_declaration name: (field_identifier) @name) @function
+        (import_declaration) @import
+    """
+}
+
+# Capture labels that mark a full definition node; the label is the symbol type
+_DEFINITION_CAPTURES: frozenset = frozenset(("class", "function"))
+
 # Maps language names to their file extensions (used for file discovery during indexing)
 SUPPORTED_EXTENSIONS: Dict[str, tuple] = {
     "python": (".py",),
@@ -50,6 +105,104 @@ ALL_SUPPORTED_EXTENSIONS: tuple = tuple(
     ext for exts in SUPPORTED_EXTENSIONS.values() for ext in exts
 )
 
+# Reverse mapping (extension -> language) for a single dict lookup per file
+_EXTENSION_LANGUAGES: Dict[str, str] = {
+    ext: lang for lang, exts in SUPPORTED_EXTENSIONS.items() for ext in exts
+}
+
+# Maximum number of parse trees kept for incremental re-parsing (LRU eviction)
+TREE_CACHE_MAX_SIZE: int = 128
+
+# Maximum number of extract_code_by_symbol results kept (LRU eviction)
+EXTRACT_CACHE_MAX_SIZE: int = 512
+
+
+def _common_prefix_length(a: bytes, b: bytes) -> int:
+    """
+    Length of the longest common prefix of two byte strings.
+
+    Binary search over slice comparisons keeps the work in C (memcmp)
+    instead of comparing byte by byte in Python.
+    """
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _point_at(data: bytes, byte_offset: int) -> Tuple[int, int]:
+    """Convert a byte offset into a Tree-sitter (row, column) point."""
+    return _advance_point(data, 0, (0, 0), byte_offset)
+
+
+def _advance_point(data: bytes, from_byte: int, from_point: Tuple[int, int], to_byte: int) -> Tuple[int, int]:
+    """
+    Compute the point of `to_byte` from an already-known earlier point.
+
+    Only the bytes between the two offsets are scanned, so deriving several
+    points of the same edit does not re-count the newlines of the common prefix.
+    """
+    row, column = from_point
+    newlines = data.count(b'\n', from_byte, to_byte)
+    if not newlines:
+        return row, column + (to_byte - from_byte)
+    return row + newlines, to_byte - (data.rfind(b'\n', from_byte, to_byte) + 1)
+
+
+def _read_source_bytes(file_path: str) -> bytes:
+    """
+    Read a source file as raw bytes, with newlines normalized like text mode.
+
+    Tree-sitter parses bytes and reports byte offsets, so reading in binary mode
+    avoids decoding the file only to encode it again. Newline normalization
+    keeps offsets and extracted code identical to universal-newline reading.
+    """
+    with open(file_path, 'rb') as f:
+        return _normalize_newlines(f.read())
+
+
+def _normalize_newlines(raw: bytes) -> bytes:
+    """Convert `\r\n` and lone `\r` line endings to `\n`, as text mode would."""
+    if b'\r' in raw:
+        raw = raw.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return raw
+
+
+def relocate_items(items: List[ContextItem], file_path: str) -> List[ContextItem]:
+    """
+    Copy the items produced for one file so they describe an identical file elsewhere.
+
+    Used by the indexer to reuse the analysis of byte-identical files (vendored
+    copies, generated stubs) instead of parsing each copy again. IDs, names and
+    paths are rewritten for the new location; everything else is unchanged.
+    """
+    relative_path = sys.intern(os.path.basename(file_path))
+    relocated = []
+    for item in items:
+        metadata = dict(item.metadata)
+        if metadata.get("type") == "file":
+            old_name = metadata["name"]
+            metadata["name"] = relative_path
+            metadata["path"] = file_path
+            item_id = f"file:{relative_path}"
+            content = item.content.replace(f"File: {old_name}", f"File: {relative_path}", 1)
+        else:
+            metadata["file"] = file_path
+            item_id = f"{metadata['type']}:{relative_path}:{metadata['name']}"
+            content = item.content
+        metadata["dependencies"] = list(metadata.get("dependencies", []))
+        relocated.append(item.model_copy(update={
+            "id": item_id,
+            "content": content,
+            "metadata": metadata,
+            "source_file": file_path,
+        }))
+    return relocated
+
 
 def get_language_for_file(file_path: str) -> Optional[str]:
     """
@@ -58,10 +211,8 @@ def get_language_for_file(file_path: str) -> Optional[str]:
     Used by the CLI and MCP server to select the correct analyzer for a file.
     Returns None for unsupported file types (which should be skipped during indexing).
     """
-    for lang, exts in SUPPORTED_EXTENSIONS.items():
-        if file_path.endswith(exts):
-            return lang
-    return None
+    # Everything from the last dot; without a dot this is a single char that never matches
+    return _EXTENSION_LANGUAGES.get(file_path[file_path.rfind('.'):])
 
 
 class TreeSitterAnalyzer(BaseAnalyzer):
@@ -69,135 +220,155 @@ class TreeSitterAnalyzer(BaseAnalyzer):
     AST-based source code analyzer supporting Python, JavaScript, TypeScript, and Go.
 
     Uses Tree-sitter for parsing, which provides:
-    - Fast incremental parsing (not used yet, but possible for IDE integration)
+    - Fast incremental parsing: re-analyzing a file in the same process reuses
+      its last tree from _tree_cache, so only the edited subtrees are re-parsed
     - Language-agnostic query syntax for extracting symbols
     - Robust error recovery (can parse partially broken files)
 
-    Class-level caches ensure compiled queries and regex patterns are reused
-    across multiple file analyses, significantly improving indexing performance.
+    Class-level caches ensure loaded grammars and compiled queries are reused
+    across multiple analyzer instances, significantly improving indexing performance.
     """
 
+    # Shared cache: loaded Tree-sitter grammars (loading the shared library is not free)
+    _languages: Dict[str, object] = {}
+
     # Shared cache: compiled Tree-sitter queries (expensive to compile)
     _compiled_queries: Dict[str, object] = {}
 
-    # Shared cache: regex patterns for symbol name matching in function bodies
-    _symbol_patterns: Dict[str, Pattern] = {}
+    # Shared cache: one analyzer per language for long-lived callers (see for_language)
+    _instances: Dict[str, "TreeSitterAnalyzer"] = {}
+
+    # Shared cache (LRU): (language, path) -> (source bytes, parse tree) of the last parse
+    _tree_cache: "OrderedDict[Tuple[str, str], Tuple[bytes, object]]" = OrderedDict()
+
+    # Shared cache (LRU): (language, path, mtime_ns, size, symbol, line) -> extracted code
+    _extract_cache: "OrderedDict[Tuple, Optional[str]]" = OrderedDict()
 
     def __init__(self, language_name: str):
         self.language_name = language_name
-        self.language = tree_sitter_languages.get_language(language_name)
+        if language_name not in TreeSitterAnalyzer._languages:
+            TreeSitterAnalyzer._languages[language_name] = tree_sitter_languages.get_language(language_name)
+        self.language = TreeSitterAnalyzer._languages[language_name]
         self.parser = Parser()
         self.parser.set_language(self.language)
 
-        # Tree-sitter S-expression queries for each language.
-        # These queries capture:
-        #   @name  - The identifier node (used to get the symbol name)
-        #   @class/@function/@import - The full definition node (used for context)
-        #
-        # Note: TypeScript interfaces are treated as "class" for simplicity.
-        # Note: Arrow functions assigned to variables are captured as functions.
-        self.queries = {
-            "python": """
-                (class_definition name: (identifier) @name) @class
-                (function_definition name: (identifier) @name) @function
-                (import_statement) @import
-                (import_from_statement) @import
-            """,
-            "javascript": """
-                (class_declaration name: (identifier) @name) @class
-                (function_declaration name: (identifier) @name) @function
-                (variable_declarator
-                    name: (identifier) @name
-                    value: [(arrow_function) (function_expression)]
-                ) @function
-                (import_statement source: (string) @import_source) @import
-            """,
-            "typescript": """
-                (class_declaration name: (identifier) @name) @class
-                (interface_declaration name: (type_identifier) @name) @class
-                (function_declaration name: (identifier) @name) @function
-                (variable_declarator
-                    name: (identifier) @name
-                    value: [(arrow_function) (function_expression)]
-                ) @function
-                (import_statement source: (string) @import_source) @import
-            """,
-            "go": """
-                (type_declaration spec: (type_spec name: (type_identifier) @name)) @class
-                (function_declaration name: (identifier) @name) @function
-                (method_declaration name: (field_identifier) @name) @function
-                (import_declaration) @import
-            """
-        }
-
-        self._ensure_compiled_query()
-
-    def _ensure_compiled_query(self) -> None:
-        """Lazily compile and cache the Tree-sitter query for this language."""
-        cache_key = self.language_name
-        if cache_key not in TreeSitterAnalyzer._compiled_queries:
-            query_scm = self.queries.get(self.language_name)
-            if query_scm:
-                TreeSitterAnalyzer._compiled_queries[cache_key] = self.language.query(query_scm)
+        # Bound once per instance so hot paths skip the class-level dict lookup
+        self._query = self._ensure_compiled_query()
 
-    def _get_compiled_query(self):
-        """Retrieve the cached compiled query, or None if language is unsupported."""
-        return TreeSitterAnalyzer._compiled_queries.get(self.language_name)
+        # Import parser for this language, picked once instead of per import node
+        self._parse_import_text = {
+            "python": self._parse_python_import,
+            "javascript": self._parse_js_import,
+            "typescript": self._parse_js_import,
+            "go": self._parse_go_import,
+        }.get(language_name)
 
-    def _get_symbol_pattern(self, name: str) -> Pattern:
+    @classmethod
+    def for_language(cls, language_name: str) -> "TreeSitterAnalyzer":
         """
-        Get or create a cached regex pattern for whole-word symbol matching.
+        Return the shared analyzer for a language, creating it on first use.
 
-        Used to detect if a known symbol (class/function name) appears in a
-        function body, indicating a local dependency within the same file.
+        Lets the CLI, indexing workers and the MCP server reuse one parser per
+        language instead of constructing an analyzer for every file or request.
         """
-        if name not in TreeSitterAnalyzer._symbol_patterns:
-            TreeSitterAnalyzer._symbol_patterns[name] = re.compile(rf'\b{re.escape(name)}\b')
-        return TreeSitterAnalyzer._symbol_patterns[name]
+        analyzer = cls._instances.get(language_name)
+        if analyzer is None:
+            analyzer = cls._instances[language_name] = cls(language_name)
+        return analyzer
 
-    def _extract_imports(self, tree, content_bytes: bytes) -> List[str]:
+    def _ensure_compiled_query(self):
         """
-        Extract module/package import paths from the AST.
+        Compile the Tree-sitter query for this language once per process.
 
-        Returns a list of import targets (e.g., "os", "react", "../utils").
-        These are stored as file-level dependencies and inherited by all
-        symbols defined in the file.
+        Returns the shared compiled query, or None if the language is unsupported.
         """
-        imports: Set[str] = set()
+        cache_key = self.language_name
+        if cache_key not in TreeSitterAnalyzer._compiled_queries:
+            query_scm = _QUERIES.get(self.language_name)
+            if query_scm:
+                TreeSitterAnalyzer._compiled_queries[cache_key] = self.language.query(query_scm)
+        return TreeSitterAnalyzer._compiled_queries.get(cache_key)
 
-        query = self._get_compiled_query()
-        if not query:
-            return []
+    def _parse(self, file_path: str, content_bytes: bytes, cache_tree: bool = True):
+        """
+        Parse source bytes, reusing the previous tree for this file when possible.
 
-        captures = query.captures(tree.root_node)
+        Long-lived processes (MCP server, repeated reads) often parse the same
+        file many times:
+          - Identical bytes: the cached tree is returned without parsing
+          - Changed bytes: the changed byte range is applied with tree.edit()
+            and the old tree is passed to the parser, so Tree-sitter only
+            re-parses the subtrees that changed
 
-        for node, capture_name in captures:
-            if capture_name == "import":
-                import_text = node.text.decode('utf8')
+        With cache_tree=False the bytes are parsed from scratch and the tree is
+        not kept, for callers that see each file once.
+        """
+        if not cache_tree:
+            return self.parser.parse(content_bytes)
+
+        cache = TreeSitterAnalyzer._tree_cache
+        cache_key = (self.language_name, file_path)
+        cached = cache.get(cache_key)
+
+        if cached is None:
+            tree = self.parser.parse(content_bytes)
+        else:
+            old_bytes, old_tree = cached
+            if old_bytes == content_bytes:
+                cache.move_to_end(cache_key)
+                return old_tree
+
+            # Single edit spanning everything between the common prefix and suffix
+            start = _common_prefix_length(old_bytes, content_bytes)
+            suffix = _common_prefix_length(old_bytes[start:][::-1], content_bytes[start:][::-1])
+            old_end = len(old_bytes) - suffix
+            new_end = len(content_bytes) - suffix
+
+            # Old and new share the prefix, so the start point is valid for both
+            start_point = _point_at(content_bytes, start)
+            old_tree.edit(
+                start_byte=start,
+                old_end_byte=old_end,
+                new_end_byte=new_end,
+                start_point=start_point,
+                old_end_point=_advance_point(old_bytes, start, start_point, old_end),
+                new_end_point=_advance_point(content_bytes, start, start_point, new_end),
+            )
+            tree = self.parser.parse(content_bytes, old_tree)
 
-                if self.language_name == "python":
-                    # Handle: import foo, from foo import bar
-                    imports.update(self._parse_python_import(import_text))
-                elif self.language_name in ("javascript", "typescript"):
-                    # Handle: import { x } from 'module'
-                    imports.update(self._parse_js_import(import_text))
-                elif self.language_name == "go":
-                    # Handle: import "fmt" or import ( "fmt" "os" )
-                    imports.update(self._parse_go_import(import_text))
+        cache[cache_key] = (content_bytes, tree)
+        cache.move_to_end(cache_key)
+        if len(cache) > TREE_CACHE_MAX_SIZE:
+            cache.popitem(last=False)
+        return tree
 
-        return list(imports)
+    def _parse_import(self, import_node) -> List[str]:
+        """
+        Extract module/package import paths from an import node.
 
-    def _parse_python_import(self, import_text: str) -> Set[str]:
+        Returns import targets (e.g., "os", "react", "../utils") in source order,
+        without duplicates. These are stored as file-level dependencies and
+        inherited by all symbols defined in the file.
+        """
+        # Python: import foo, from foo import bar
+        # JS/TS:  import { x } from 'module'
+        # Go:     import "fmt" or import ( "fmt" "os" )
+        if self._parse_import_text is None:
+            return []
+        return self._parse_import_text(import_node.text.decode('utf8'))
+
+    def _parse_python_import(self, import_text: str) -> List[str]:
         """
         Parse Python import statements into module names.
 
         Handles both forms:
-          - `import foo, bar.baz` -> {"foo", "bar.baz"}
-          - `from foo.bar import baz` -> {"foo.bar"}
+          - `import foo, bar.baz` -> ["foo", "bar.baz"]
+          - `from foo.bar import baz` -> ["foo.bar"]
 
         The `as` alias is stripped since we care about the source module.
         """
-        deps: Set[str] = set()
+        # Dict keys give order-preserving dedup (a set would make output order vary)
+        deps: Dict[str, None] = {}
         lines = import_text.strip().split('\n')
 
         for line in lines:
@@ -205,48 +376,51 @@ class TreeSitterAnalyzer(BaseAnalyzer):
             if line.startswith('from '):
                 parts = line.split(' import ')[0].replace('from ', '').strip()
                 if parts:
-                    deps.add(parts)
+                    deps[parts] = None
             elif line.startswith('import '):
                 modules = line.replace('import ', '').split(',')
                 for mod in modules:
                     mod = mod.strip().split(' as ')[0].strip()
                     if mod:
-                        deps.add(mod)
-        return deps
+                        deps[mod] = None
+        return list(deps)
 
-    def _parse_js_import(self, import_text: str) -> Set[str]:
+    def _parse_js_import(self, import_text: str) -> List[str]:
         """
         Parse JavaScript/TypeScript import statements.
 
         Handles:
-          - `import { x } from 'module'` -> {"module"}
-          - `import 'side-effect-module'` -> {"side-effect-module"}
+          - `import { x } from 'module'` -> ["module"]
+          - `import 'side-effect-module'` -> ["side-effect-module"]
 
         Uses pre-compiled regex for efficiency during bulk indexing.
         """
-        deps: Set[str] = set()
-        for match in _JS_IMPORT_PATTERN.finditer(import_text):
-            module = match.group(1) or match.group(2)
-            if module:
-                deps.add(module)
-        return deps
-
-    def _parse_go_import(self, import_text: str) -> Set[str]:
+        return list(dict.fromkeys(
+            module
+            for match in _JS_IMPORT_PATTERN.finditer(import_text)
+            for module in (match.group(1) or match.group(2),)
+            if module
+        ))
+
+    def _parse_go_import(self, import_text: str) -> List[str]:
         """
         Parse Go import declarations.
 
         Handles both single and grouped imports:
-          - `import "fmt"` -> {"fmt"}
-          - `import ( "fmt" "os" )` -> {"fmt", "os"}
+          - `import "fmt"` -> ["fmt"]
+          - `import ( "fmt" "os" )` -> ["fmt", "os"]
         """
-        deps: Set[str] = set()
-        for match in _GO_IMPORT_PATTERN.finditer(import_text):
-            pkg = match.group(1)
-            if pkg:
-                deps.add(pkg)
-        return deps
-
-    def _find_dependencies_in_body(self, def_node, all_names: Set[str], content_bytes: bytes) -> List[str]:
+        return list(dict.fromkeys(
+            match.group(1) for match in _GO_IMPORT_PATTERN.finditer(import_text) if match.group(1)
+        ))
+
+    def _find_dependencies_in_body(
+        self,
+        def_node,
+        all_names: Set[str],
+        content_bytes: bytes,
+        ascii_content: Optional[str] = None
+    ) -> List[str]:
         """
         Detect intra-file dependencies by scanning a function/class body for references.
 
@@ -255,17 +429,20 @@ class TreeSitterAnalyzer(BaseAnalyzer):
           - `result = HelperClass.process(data)`
           - `return calculate_total(items)`
 
-        Two-phase check: fast substring scan, then regex confirmation for whole-word match.
+        Single pass: tokenize the body into identifiers once, then keep the known
+        names. This is a whole-word match without one regex per name. Results are
+        in order of first occurrence, so dependency lists are deterministic.
+
+        When the file is pure ASCII, byte offsets equal character offsets, so the
+        body is sliced from the already-decoded text (pass it as `ascii_content`)
+        instead of decoding nested bodies again and again.
         """
-        deps: Set[str] = set()
-        body_text = def_node.text.decode('utf8')
-
-        for name in all_names:
-            if name in body_text:
-                pattern = self._get_symbol_pattern(name)
-                if pattern.search(body_text):
-                    deps.add(name)
-        return list(deps)
+        if ascii_content is not None:
+            body_text = ascii_content[def_node.start_byte:def_node.end_byte]
+        else:
+            body_text = content_bytes[def_node.start_byte:def_node.end_byte].decode('utf8')
+        tokens = dict.fromkeys(_IDENTIFIER_PATTERN.findall(body_text))
+        return [sys.intern(token) for token in tokens if token in all_names]
 
     def analyze_file(self, file_path: str) -> List[ContextItem]:
         """
@@ -283,19 +460,72 @@ class TreeSitterAnalyzer(BaseAnalyzer):
             return []
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except (UnicodeDecodeError, FileNotFoundError, IOError, OSError) as e:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+        except (FileNotFoundError, IOError, OSError) as e:
             logger.warning(f"Could not read {file_path}: {e}")
             return []
 
-        content_bytes = bytes(content, "utf8")
-        tree = self.parser.parse(content_bytes)
+        return self.analyze_bytes(raw, file_path)
+
+    def analyze_bytes(self, raw: bytes, file_path: str, cache_tree: bool = True) -> List[ContextItem]:
+        """
+        Analyze source bytes that were already read from `file_path`.
+
+        Same result as analyze_file, for callers that hold the file contents
+        (e.g. the indexer, which hashes files to skip identical copies).
+        cache_tree=False skips _tree_cache: an index run parses each file once,
+        so keeping its tree would only hold memory and evict the trees of
+        callers that do parse files again.
+        """
+        try:
+            content_bytes = _normalize_newlines(raw)
+            content = content_bytes.decode('utf-8')
+        except UnicodeDecodeError as e:
+            logger.warning(f"Could not read {file_path}: {e}")
+            return []
+
+        tree = self._parse(file_path, content_bytes, cache_tree)
+
+        # Import paths, symbol names and the file name repeat across thousands of
+        # items (every symbol inherits its file's imports), so they are interned
+        # to keep one shared string object per distinct value.
+        #
+        # Single pass over the query captures collects both imports and symbols.
+        # Symbol names are needed up front for intra-file dependency detection,
+        # so ContextItems are created in a second pass over the collected nodes.
+        imports: Dict[str, None] = {}
+        all_symbol_names: Set[str] = set()
+        symbol_nodes: List[tuple] = []
+
+        query = self._query
+        captures = query.captures(tree.root_node) if query else []
+
+        # Each definition's @class/@function capture is emitted right before its
+        # @name capture, so the label and definition node come from the query
+        # itself rather than from inspecting node.parent types
+        pending_def = None
+        for node, capture_name in captures:
+            if capture_name == "import":
+                imports.update(dict.fromkeys(map(sys.intern, self._parse_import(node))))
+            elif capture_name in _DEFINITION_CAPTURES:
+                pending_def = (node, capture_name)
+            elif capture_name == "name" and pending_def is not None:
+                def_node, type_str = pending_def
+                name_text = sys.intern(node.text.decode('utf8'))
+                all_symbol_names.add(name_text)
+
+                # Arrow functions: include the enclosing `const x = ...` declaration
+                if def_node.type == "variable_declarator" and def_node.parent is not None:
+                    def_node = def_node.parent
 
-        file_imports = self._extract_imports(tree, content_bytes)
+                start_line = def_node.start_point[0] + 1
+                symbol_nodes.append((name_text, type_str, def_node, start_line))
 
-        # Create the file-level item first (always included even if no symbols found)
-        relative_path = os.path.basename(file_path)
+        file_imports = list(imports)
+
+        # The file-level item comes first (always included even if no symbols found)
+        relative_path = sys.intern(os.path.basename(file_path))
         items = [ContextItem(
             id=f"file:{relative_path}",
             layer=ContextLayer.PROJECT,
@@ -310,150 +540,142 @@ class TreeSitterAnalyzer(BaseAnalyzer):
             line_number=1
         )]
 
-        query = self._get_compiled_query()
-        if not query:
-            return items
+        # The file was decoded once above; reuse that text for ASCII sources
+        ascii_content = content if len(content) == len(content_bytes) else None
 
-        captures = query.captures(tree.root_node)
+        # Pass 2: Create ContextItems for each symbol with merged dependencies.
+        # Hot names are bound to locals once instead of looked up per symbol.
+        make_item = ContextItem
+        semantic_layer = ContextLayer.SEMANTIC
+        find_local_refs = self._find_dependencies_in_body
 
-        # Two-pass algorithm:
-        # Pass 1: Collect all symbol names (needed for intra-file dependency detection)
-        # Pass 2: Create ContextItems with computed dependencies
-        all_symbol_names: Set[str] = set()
-        symbol_nodes: List[tuple] = []
-
-        for node, capture_name in captures:
-            if capture_name == "name":
-                parent = node.parent
-                if not parent:
-                    continue
-                grandparent = parent.parent if parent else None
-
-                type_str = None
-
-                # Python
-                if parent.type == "class_definition":
-                    type_str = "class"
-                elif parent.type == "function_definition":
-                    type_str = "function"
-
-                # JS/TS
-                elif parent.type == "class_declaration":
-                    type_str = "class"
-                elif parent.type == "function_declaration":
-                    type_str = "function"
-                elif parent.type == "variable_declarator":
-                    type_str = "function"
-                elif parent.type == "interface_declaration":
-                    type_str = "class"
-
-                # Go
-                elif parent.type == "type_spec":
-                    type_str = "class"
-                elif parent.type == "method_declaration":
-                    type_str = "function"
-
-                if type_str:
-                    name_text = node.text.decode('utf8')
-                    all_symbol_names.add(name_text)
-
-                    # Determine definition node
-                    def_node = parent
-                    if type_str == "class" and self.language_name == "go":
-                        if grandparent is not None:
-                            def_node = grandparent
-                    elif parent.type == "variable_declarator":
-                        if parent.parent is not None:
-                            def_node = parent.parent
-
-                    start_line = def_node.start_point[0] + 1
-                    symbol_nodes.append((name_text, type_str, def_node, start_line))
-
-        file_imports_set = set(file_imports)
-
-        # Pass 2: Create ContextItems for each symbol with merged dependencies
-        for name_text, type_str, def_node, start_line in symbol_nodes:
-            # Find symbols referenced in this definition's body (excluding self-reference)
-            local_refs = self._find_dependencies_in_body(
-                def_node,
-                all_symbol_names - {name_text},
-                content_bytes
-            )
-
-            # Dependencies = file-level imports + local symbol references
-            dependencies = list(file_imports_set | set(local_refs))
-
-            items.append(ContextItem(
+        items.extend(
+            make_item(
                 id=f"{type_str}:{relative_path}:{name_text}",
-                layer=ContextLayer.SEMANTIC,
+                layer=semantic_layer,
                 content=f"{type_str} {name_text}",
                 metadata={
                     "type": type_str,
                     "name": name_text,
                     "file": file_path,
                     "lineno": start_line,
-                    "dependencies": dependencies
+                    # Dependencies = file-level imports + local symbol references
+                    # (found in this definition's body, excluding self-reference)
+                    "dependencies": list(dict.fromkeys(file_imports + find_local_refs(
+                        def_node,
+                        all_symbol_names - {name_text},
+                        content_bytes,
+                        ascii_content
+                    )))
                 },
                 source_file=file_path,
                 line_number=start_line
-            ))
+            )
+            for name_text, type_str, def_node, start_line in symbol_nodes
+        )
 
         return items
 
-    def extract_code_by_symbol(self, file_path: str, symbol_name: str) -> Optional[str]:
+    def extract_code_by_symbol(
+        self,
+        file_path: str,
+        symbol_name: str,
+        line_number: Optional[int] = None
+    ) -> Optional[str]:
         """
         Extract the full source code of a specific symbol (class/function) from a file.
 
         Used by the "read" command to fetch live code on-demand, ensuring the user
         always sees the current version even if the index is stale.
 
+        When the indexed line_number is given, the query only runs over that line;
+        if the symbol is no longer defined there, the whole file is searched.
+
         Returns None if the symbol is not found (may have been renamed or deleted).
+
+        Results are cached per file version (mtime and size), so repeated reads
+        of an unchanged file skip reading and querying it.
         """
-        if not os.path.exists(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
             return None
 
+        cache = TreeSitterAnalyzer._extract_cache
+        cache_key = (self.language_name, file_path, stat.st_mtime_ns, stat.st_size, symbol_name, line_number)
+        if cache_key in cache:
+            cache.move_to_end(cache_key)
+            return cache[cache_key]
+
+        code = self._extract_code(file_path, symbol_name, line_number)
+        cache[cache_key] = code
+        if len(cache) > EXTRACT_CACHE_MAX_SIZE:
+            cache.popitem(last=False)
+        return code
+
+    def _extract_code(
+        self,
+        file_path: str,
+        symbol_name: str,
+        line_number: Optional[int]
+    ) -> Optional[str]:
+        """Uncached body of extract_code_by_symbol."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except (UnicodeDecodeError, IOError, OSError):
+            content_bytes = _read_source_bytes(file_path)
+        except (IOError, OSError):
+            return None
+
+        # Encode the target once so each captured name is a plain bytes compare
+        symbol_bytes = symbol_name.encode('utf-8')
+
+        # A symbol whose name never occurs in the file cannot be defined there;
+        # one C-level substring scan is far cheaper than parsing and querying
+        if symbol_bytes not in content_bytes:
             return None
 
-        tree = self.parser.parse(bytes(content, "utf8"))
+        tree = self._parse(file_path, content_bytes)
 
-        query = self._get_compiled_query()
+        query = self._query
         if not query:
             return None
 
-        captures = query.captures(tree.root_node)
         target_node = None
+        if line_number:
+            # Captures of definitions intersecting the indexed line only
+            line_captures = query.captures(
+                tree.root_node,
+                start_point=(line_number - 1, 0),
+                end_point=(line_number, 0)
+            )
+            target_node = self._find_definition(line_captures, symbol_bytes, line_number - 1)
 
-        # Search for a matching symbol name in the captures
-        for node, capture_name in captures:
-            if capture_name == "name":
-                if node.text.decode('utf8') == symbol_name:
-                    parent = node.parent
-                    if not parent:
-                        continue
-                    grandparent = parent.parent if parent else None
-
-                    # Determine the full definition node based on AST structure
-                    if parent.type in [
-                        "class_definition", "function_definition",
-                        "class_declaration", "function_declaration",
-                        "method_declaration", "interface_declaration"
-                    ]:
-                        target_node = parent
-                    elif parent.type == "variable_declarator":
-                        target_node = parent.parent if parent.parent else parent
-                    elif parent.type == "type_spec":
-                        target_node = grandparent if grandparent else parent
-
-                    if target_node:
-                        break
+        if target_node is None:
+            target_node = self._find_definition(query.captures(tree.root_node), symbol_bytes)
 
         if target_node:
-            start_byte = target_node.start_byte
-            end_byte = target_node.end_byte
-            return content.encode('utf-8')[start_byte:end_byte].decode('utf-8')
+            # Slice the bytes we parsed; only the symbol's own range is decoded
+            try:
+                return content_bytes[target_node.start_byte:target_node.end_byte].decode('utf-8')
+            except UnicodeDecodeError:
+                return None
 
         return None
+
+    def _find_definition(self, captures, symbol_bytes: bytes, start_row: Optional[int] = None):
+        """
+        Return the first definition node named symbol_bytes in the captures.
+
+        As in analyze_file, the definition capture precedes the name capture it
+        belongs to. With start_row, only a definition starting on that row counts.
+        """
+        pending_def = None
+        for node, capture_name in captures:
+            if capture_name in _DEFINITION_CAPTURES:
+                pending_def = node
+            elif capture_name == "name" and pending_def is not None and node.text == symbol_bytes:
+                def_node = pending_def
+                if def_node.type == "variable_declarator" and def_node.parent is not None:
+                    def_node = def_node.parent
+                if start_row is None or def_node.start_point[0] == start_row:
+                    return def_node
+        return None
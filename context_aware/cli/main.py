@@ -13,209 +13,636 @@ Commands:
 The CLI orchestrates all major components: analyzer, store, router, compiler, linker.
 """
 import argparse
+import hashlib
 import logging
 import os
-from typing import Dict
-
-from tqdm import tqdm
-
-from ..store.sqlite_store import SQLiteContextStore
-from ..analyzer.ts_analyzer import (
-    TreeSitterAnalyzer,
-    ALL_SUPPORTED_EXTENSIONS,
-    get_language_for_file,
-)
-from ..router.graph_router import GraphRouter
-from ..compiler.simple_compiler import SimpleCompiler
-from ..linker.graph_linker import GraphLinker
-from ..mcp_server import start_mcp
-from ..services.embedding_service import EmbeddingService
-from ..models.context_item import ContextItem
-from ..tools.structure import StructureGenerator
-from ..integrations.claude import setup_claude_integration
+import subprocess
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import chain
+from stat import S_ISDIR, S_ISREG
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Everything beyond the standard library is imported inside the handlers that
+# use it. The CLI is run by editor hooks on every prompt, so startup should only
+# pay for the one command being run (the MCP SDK and pydantic models dominate).
+if TYPE_CHECKING:
+    from ..models.context_item import ContextItem
+    from ..store.sqlite_store import SQLiteContextStore
 
 logger = logging.getLogger(__name__)
 
+# Files handed to each indexing worker per round trip (amortizes IPC overhead)
+INDEX_CHUNK_SIZE = 32
 
-def main():
-    """
-    CLI entry point. Parses arguments and dispatches to the appropriate handler.
-    """
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(levelname)s: %(message)s'
-    )
+# Below this many files to parse, indexing stays in-process (no worker startup)
+INDEX_PARALLEL_MIN_FILES = 8
 
-    parser = argparse.ArgumentParser(description="ContextAware CLI")
-    parser.add_argument("--root", default=".", help="Root directory of the project (containing .context_aware)")
-    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
-    subparsers = parser.add_subparsers(dest="command")
+# Items accumulated before each store.save call while indexing (bounds memory)
+INDEX_SAVE_BATCH_SIZE = 1000
+
+# Files read, hashed and handed to the parsers per window while indexing: at
+# most two windows of file contents are in memory, however many files changed
+INDEX_READ_WINDOW_FILES = 500
 
-    # Command: init - Creates .context_aware/ and initializes the SQLite database
-    init_parser = subparsers.add_parser("init", help="Initialize the context store")
+# Files larger than this (bytes) are skipped: minified bundles and generated
+# blobs are slow to parse and add nothing useful to the index
+MAX_INDEX_FILE_SIZE = 1024 * 1024
+
+# Directories never indexed, besides hidden ones: installed dependencies and
+# bytecode caches hold most of a repo's files but none of its own source
+INDEX_SKIP_DIRS = frozenset(("node_modules", "__pycache__"))
+
+# Threads listing directories in parallel while scanning (I/O-bound, so more
+# threads than cores pays off on network mounts)
+SCAN_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def _add_init_arguments(init_parser: argparse.ArgumentParser) -> None:
+    """Command: init - Creates .context_aware/ and initializes the SQLite database."""
     init_parser.add_argument("--claude", action="store_true", help="Set up Claude Code integration (hooks, skills)")
 
-    # Command: index - Parses source files and populates the database
-    index_parser = subparsers.add_parser("index", help="Index the current project or a file")
+
+def _positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1 (e.g. --jobs)."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _add_index_arguments(index_parser: argparse.ArgumentParser) -> None:
+    """Command: index - Parses source files and populates the database."""
     index_parser.add_argument("path", help="Path to file or directory to index")
     index_parser.add_argument("--re-index", action="store_true", help="Force re-indexing if index already exists")
     index_parser.add_argument("--semantic", action="store_true", help="Generate embeddings for semantic search (slower)")
+    index_parser.add_argument("--quantize", action="store_true", help="Store --semantic embeddings as int8 (4x smaller, near-identical ranking)")
+    index_parser.add_argument("--jobs", "-j", type=_positive_int, default=None, help="Worker processes for parsing (default: CPU count, 1 = no workers)")
+    index_parser.add_argument("--max-file-size", type=int, default=MAX_INDEX_FILE_SIZE, help="Skip files larger than this many bytes (default: 1 MiB)")
+
 
-    # Command: search - Query the index with FTS or hybrid semantic search
-    search_parser = subparsers.add_parser("search", help="Search the context")
+def _add_search_arguments(search_parser: argparse.ArgumentParser) -> None:
+    """Command: search - Query the index with FTS or hybrid semantic search."""
     search_parser.add_argument("text", help="Search text")
     search_parser.add_argument("--type", choices=["class", "function", "file"], help="Filter by item type")
     search_parser.add_argument("--output", help="Output file path (optional)")
     search_parser.add_argument("--semantic", action="store_true", help="Use hybrid semantic search")
 
-    # Command: read - Fetch full source code for a specific indexed item
-    read_parser = subparsers.add_parser("read", help="Read specific item content (Full Mode)")
+
+def _add_read_arguments(read_parser: argparse.ArgumentParser) -> None:
+    """Command: read - Fetch full source code for a specific indexed item."""
     read_parser.add_argument("id", help="Exact ID of the context item")
 
-    # Command: impacts - Reverse dependency lookup (who calls/uses this item?)
-    impacts_parser = subparsers.add_parser("impacts", help="Analyze what depends on a specific item")
+
+def _add_impacts_arguments(impacts_parser: argparse.ArgumentParser) -> None:
+    """Command: impacts - Reverse dependency lookup (who calls/uses this item?)."""
     impacts_parser.add_argument("id", help="Target Item ID (e.g. class:user.py:User)")
 
-    # Command: structure - Show project structure overview
-    structure_parser = subparsers.add_parser("structure", help="Show project structure overview")
+
+def _add_structure_arguments(structure_parser: argparse.ArgumentParser) -> None:
+    """Command: structure - Show project structure overview."""
     structure_parser.add_argument("--compact", action="store_true", help="Minimal output for context injection")
     structure_parser.add_argument("--inject", action="store_true", help="Output without headers (for hooks)")
 
-    # Command: serve/mcp - Start MCP server for AI assistant integration
-    subparsers.add_parser("serve", help="Start MCP (Model Context Protocol) Server")
-    subparsers.add_parser("mcp", help="Alias for serve")
+
+# Subcommand registry: name -> (help text, function adding its arguments).
+# serve/mcp start the MCP (Model Context Protocol) server and take no arguments.
+_SUBCOMMANDS: Dict[str, Tuple[str, Optional[Callable[[argparse.ArgumentParser], None]]]] = {
+    "init": ("Initialize the context store", _add_init_arguments),
+    "index": ("Index the current project or a file", _add_index_arguments),
+    "search": ("Search the context", _add_search_arguments),
+    "read": ("Read specific item content (Full Mode)", _add_read_arguments),
+    "impacts": ("Analyze what depends on a specific item", _add_impacts_arguments),
+    "structure": ("Show project structure overview", _add_structure_arguments),
+    "serve": ("Start MCP (Model Context Protocol) Server", None),
+    "mcp": ("Alias for serve", None),
+}
+
+# Global options that consume the following token as their value
+_GLOBAL_OPTIONS_WITH_VALUE = ("--root",)
+
+
+def _requested_command(argv: Sequence[str]) -> Optional[str]:
+    """
+    Find the subcommand name in argv without running the full parser.
+
+    Returns None when no known subcommand is present (e.g. `--help` or a typo),
+    in which case every subparser is registered so argparse can report it.
+    """
+    skip_next = False
+    for token in argv:
+        if skip_next:
+            skip_next = False
+        elif token in _GLOBAL_OPTIONS_WITH_VALUE:
+            skip_next = True
+        elif not token.startswith('-'):
+            return token if token in _SUBCOMMANDS else None
+    return None
+
+
+def main():
+    """
+    CLI entry point. Parses arguments and dispatches to the appropriate handler.
+
+    Only the subparser of the invoked command is built (all of them for help),
+    and each command imports just the components it needs.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(levelname)s: %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="ContextAware CLI")
+    parser.add_argument("--root", default=".", help="Root directory of the project (containing .context_aware)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
+    subparsers = parser.add_subparsers(dest="command")
+
+    requested = _requested_command(sys.argv[1:])
+    for name, (help_text, add_arguments) in _SUBCOMMANDS.items():
+        if requested is None or name == requested:
+            subparser = subparsers.add_parser(name, help=help_text)
+            if add_arguments:
+                add_arguments(subparser)
 
     args = parser.parse_args()
 
     if hasattr(args, 'verbose') and args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    # Without a command there is nothing to run: no store is opened just to print help
+    if args.command is None:
+        parser.print_help()
+        return
+
+    # The MCP server opens its own store on startup; nothing to set up here
+    if args.command in ("serve", "mcp"):
+        from ..mcp_server import start_mcp
+        start_mcp(root_dir=args.root)
+        return
+
+    from ..store.sqlite_store import SQLiteContextStore
+
     # Initialize store at project root (creates .context_aware/ if needed)
     store = SQLiteContextStore(root_dir=args.root)
 
     if args.command == "init":
-        logger.info(f"Initialized ContextAware store at {store.db_path}")
-        if hasattr(args, 'claude') and args.claude:
-            if setup_claude_integration(args.root):
-                logger.info("Claude Code integration set up successfully.")
-                logger.info("Created: .claude/hooks/UserPromptSubmit.toml")
-                logger.info("Created: .claude/skills/context-aware.md")
-            else:
-                logger.error("Failed to set up Claude Code integration.")
+        _handle_init(args, store)
+    else:
+        # Every handler makes many store calls (the index scan, batched saves
+        # and linking; a search's routing and graph expansion): one shared
+        # connection avoids reconnecting, and re-warming its cache, per call
+        with store:
+            _STORE_HANDLERS[args.command](args, store)
 
-    elif args.command == "index":
-        _handle_index(args, store)
 
-    elif args.command == "search":
-        _handle_search(args, store)
+def _handle_init(args, store: "SQLiteContextStore") -> None:
+    """Report the initialized store and optionally set up Claude Code integration."""
+    logger.info(f"Initialized ContextAware store at {store.db_path}")
+    if args.claude:
+        from ..integrations.claude import setup_claude_integration
 
-    elif args.command == "read":
-        _handle_read(args, store)
+        if setup_claude_integration(args.root):
+            logger.info("Claude Code integration set up successfully.")
+            logger.info("Created: .claude/hooks/UserPromptSubmit.toml")
+            logger.info("Created: .claude/skills/context-aware.md")
+        else:
+            logger.error("Failed to set up Claude Code integration.")
 
-    elif args.command == "impacts":
-        _handle_impacts(args, store)
 
-    elif args.command == "structure":
-        _handle_structure(args, store)
+def _analyze_one(job: Tuple[str, bytes]) -> List["ContextItem"]:
+    """
+    Analyze a single file's contents inside an indexing worker process.
 
-    elif args.command in ("serve", "mcp"):
-        start_mcp(root_dir=args.root)
+    Defined at module level so ProcessPoolExecutor can pickle it. Analyzers are
+    created lazily per language and reused for every file the worker receives.
+    The bytes were already read (and hashed) by the parent, so they are not re-read,
+    and each file is parsed once, so its tree is not cached.
+    """
+    from ..analyzer.ts_analyzer import TreeSitterAnalyzer, get_language_for_file
 
-    else:
-        parser.print_help()
+    full_path, raw = job
+    lang = get_language_for_file(full_path)
+    if not lang:
+        return []
+    return TreeSitterAnalyzer.for_language(lang).analyze_bytes(raw, full_path, cache_tree=False)
 
 
-def _handle_index(args, store: SQLiteContextStore) -> None:
+def _scan_directory(dir_path: str) -> Tuple[List[Tuple[str, os.stat_result]], List[str]]:
+    """
+    List one directory: (path, stat) of its supported source files, and the
+    subdirectories to descend into.
+
+    Built on os.scandir, whose directory entries already know their type, so
+    only matching files are stat'ed. Hidden directories (e.g., .git, .venv),
+    INDEX_SKIP_DIRS and directory symlinks are left out.
+    """
+    from ..analyzer.ts_analyzer import ALL_SUPPORTED_EXTENSIONS
+
+    files: List[Tuple[str, os.stat_result]] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    name = entry.name
+                    if name[0] != '.' and name not in INDEX_SKIP_DIRS and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                elif entry.name.endswith(ALL_SUPPORTED_EXTENSIONS):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue  # e.g. a broken symlink
+                    files.append((entry.path, stat))
+    except OSError as e:
+        logger.warning(f"Could not scan {dir_path}: {e}")
+        return files, []
+
+    return files, subdirs
+
+
+def _scan_source_files(root_dir: str) -> List[Tuple[str, os.stat_result]]:
+    """
+    List (path, stat) for every supported source file under root_dir.
+
+    The tree is listed one depth level at a time, with each level's directories
+    scanned in parallel threads: scandir and stat release the GIL, so on network
+    mounts and cold caches the syscall latency overlaps. Files are returned in
+    the same order as os.walk (a directory's files before its subdirectories).
+    """
+    listings: Dict[str, Tuple[List[Tuple[str, os.stat_result]], List[str]]] = {}
+
+    with ThreadPoolExecutor(max_workers=SCAN_MAX_WORKERS) as executor:
+        level = [root_dir]
+        while level:
+            next_level: List[str] = []
+            for dir_path, listing in zip(level, executor.map(_scan_directory, level)):
+                listings[dir_path] = listing
+                next_level.extend(listing[1])
+            level = next_level
+
+    # Reassemble depth-first order from the per-directory listings
+    files: List[Tuple[str, os.stat_result]] = []
+    pending = [root_dir]
+    while pending:
+        dir_files, subdirs = listings.pop(pending.pop())
+        files.extend(dir_files)
+        pending.extend(reversed(subdirs))
+    return files
+
+
+def _list_git_source_files(root_dir: str) -> Optional[List[Tuple[str, os.stat_result]]]:
+    """
+    List (path, stat) for supported source files under a git work tree root.
+
+    One `git ls-files` call returns tracked and untracked-but-not-ignored
+    files, so .gitignore'd trees (node_modules, .venv, build output) are never
+    walked. Paths inside hidden directories or INDEX_SKIP_DIRS are dropped as
+    in the directory scan. Returns None when root_dir is not a git root or git is unavailable,
+    so the caller can fall back to _scan_source_files.
+    """
+    from ..analyzer.ts_analyzer import ALL_SUPPORTED_EXTENSIONS
+
+    # .git is a file rather than a directory in linked worktrees and submodules
+    if not os.path.exists(os.path.join(root_dir, ".git")):
+        return None
+
+    try:
+        result = subprocess.run(
+            ["git", "-C", root_dir, "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            capture_output=True,
+        )
+    except OSError as e:
+        logger.debug(f"git ls-files unavailable, scanning {root_dir} instead: {e}")
+        return None
+    if result.returncode != 0:
+        logger.debug(f"git ls-files failed, scanning {root_dir} instead: {result.stderr.decode(errors='replace').strip()}")
+        return None
+
+    files: List[Tuple[str, os.stat_result]] = []
+    # Unmerged files are listed once per conflict stage
+    for rel_path in dict.fromkeys(os.fsdecode(result.stdout).split('\0')):
+        if not rel_path.endswith(ALL_SUPPORTED_EXTENSIONS):
+            continue
+        # Paths are always '/'-separated; only the directory parts are checked
+        if any(part[0] == '.' or part in INDEX_SKIP_DIRS for part in rel_path.split('/')[:-1]):
+            continue
+        full_path = os.path.join(root_dir, rel_path)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            continue  # tracked but deleted from the work tree, or a broken symlink
+        if S_ISREG(stat.st_mode):
+            files.append((os.path.normpath(full_path), stat))
+    return files
+
+
+def _read_index_jobs(
+    paths: List[str],
+    known_digests: Optional[Dict[str, bytes]] = None
+) -> Tuple[List[Tuple[str, bytes]], Dict[str, Tuple[bytes, str]], List[Tuple[str, bytes]]]:
+    """
+    Read files to index and group byte-identical ones by content hash.
+
+    Files whose digest equals their known_digests entry (the hash recorded when
+    they were last indexed) are left out: their stored items are still current.
+
+    Returns:
+      - jobs: (path, bytes) for the first file of each distinct content
+      - path_digests: path -> (content digest, first path with that content),
+        in input order, for every file that could be read and has changed
+      - unchanged: (path, digest) of the files left out
+    """
+    jobs: List[Tuple[str, bytes]] = []
+    path_digests: Dict[str, Tuple[bytes, str]] = {}
+    unchanged: List[Tuple[str, bytes]] = []
+    first_paths: Dict[bytes, str] = {}
+    known_digests = known_digests or {}
+
+    for full_path in paths:
+        try:
+            with open(full_path, 'rb') as f:
+                raw = f.read()
+        except (IOError, OSError) as e:
+            logger.warning(f"Could not read {full_path}: {e}")
+            continue
+
+        digest = hashlib.blake2b(raw, digest_size=16).digest()
+        if known_digests.get(full_path) == digest:
+            unchanged.append((full_path, digest))
+            continue
+
+        first_path = first_paths.setdefault(digest, full_path)
+        if first_path == full_path:
+            jobs.append((full_path, raw))
+        path_digests[full_path] = (digest, first_path)
+
+    return jobs, path_digests, unchanged
+
+
+def _handle_index(args, store: "SQLiteContextStore") -> None:
     """
     Index source files: parse, extract symbols, build dependency graph.
 
     Indexing pipeline:
-      1. Scan for supported files (.py, .js, .ts, .tsx, .go)
-      2. Check modification times to skip unchanged files (incremental indexing)
-      3. Parse each changed file with TreeSitterAnalyzer
-      4. Optionally generate embeddings for semantic search (--semantic flag)
-      5. Save ContextItems to SQLite with FTS indexing
+      1. Scan for supported files (.py, .js, .ts, .tsx, .go), via `git ls-files`
+         in a git repository so .gitignore is respected
+      2. Check modification times to skip unchanged files (incremental indexing),
+         then content hashes to skip files that were only touched
+      3. Parse changed files with TreeSitterAnalyzer in parallel worker processes,
+         reading them in windows of INDEX_READ_WINDOW_FILES (byte-identical
+         files in a window are parsed once and their items copied)
+      4. Optionally generate embeddings for semantic search (--semantic flag),
+         on a background thread that overlaps with parsing and saving
+      5. Save ContextItems to SQLite with FTS indexing, in bounded batches
       6. Run GraphLinker to resolve fuzzy dependencies to concrete IDs
     """
+    from tqdm import tqdm
+    from ..analyzer.ts_analyzer import ALL_SUPPORTED_EXTENSIONS, relocate_items
+    from ..linker.graph_linker import GraphLinker
+
     target_path = os.path.abspath(args.path)
     logger.info(f"Indexing {target_path}...")
 
-    files_to_process = []
-    all_scanned_files = []
+    # Changed files -> mtime from the scan's stat, reused when recording file status
+    files_to_process: Dict[str, float] = {}
+    all_scanned_files: Set[str] = set()
+
+    # One stat tells file from directory and, for a file, gives its size and mtime
+    try:
+        target_stat: Optional[os.stat_result] = os.stat(target_path)
+    except OSError:
+        target_stat = None
+    target_is_dir = target_stat is not None and S_ISDIR(target_stat.st_mode)
 
-    if os.path.isfile(target_path):
+    if target_stat is not None and S_ISREG(target_stat.st_mode):
         if target_path.endswith(ALL_SUPPORTED_EXTENSIONS):
-            all_scanned_files.append(target_path)
-            mtime = os.path.getmtime(target_path)
-            if args.re_index or store.should_reindex(target_path, mtime):
-                files_to_process.append(target_path)
+            all_scanned_files.add(target_path)
+            if target_stat.st_size > args.max_file_size:
+                logger.warning(f"Skipping {target_path}: {target_stat.st_size} bytes exceeds --max-file-size")
+            elif args.re_index or store.should_reindex(target_path, target_stat.st_mtime):
+                files_to_process[target_path] = target_stat.st_mtime
 
-    elif os.path.isdir(target_path):
+    elif target_is_dir:
         logger.info("Scanning files...")
-        for root, dirs, files in os.walk(target_path):
-            # Skip hidden directories (e.g., .git, .venv)
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
 
-            for file in files:
-                if file.endswith(ALL_SUPPORTED_EXTENSIONS):
-                    full_path = os.path.join(root, file)
-                    all_scanned_files.append(full_path)
+        # Loop invariants bound once: this body runs for every source file
+        max_file_size = args.max_file_size
+        force = args.re_index
+        add_scanned = all_scanned_files.add
+
+        # Recorded mtimes are loaded in one query rather than one per file
+        known_mtime = ({} if force else store.get_all_file_mtimes()).get
+
+        # In a git repository, ls-files respects .gitignore and skips the walk
+        source_files = _list_git_source_files(target_path)
+        if source_files is None:
+            source_files = _scan_source_files(target_path)
 
-                    mtime = os.path.getmtime(full_path)
-                    if args.re_index or store.should_reindex(full_path, mtime):
-                        files_to_process.append(full_path)
+        for full_path, stat in source_files:
+            # Oversized files are left out of the scan, so stale entries get cleaned up
+            if stat.st_size > max_file_size:
+                logger.debug(f"Skipping {full_path}: {stat.st_size} bytes exceeds --max-file-size")
+                continue
+
+            add_scanned(full_path)
+            if force or known_mtime(full_path) != stat.st_mtime:
+                files_to_process[full_path] = stat.st_mtime
 
     # Remove orphaned entries for deleted files
-    if os.path.isdir(target_path):
+    if target_is_dir:
         store.cleanup_deleted_files(all_scanned_files)
 
     logger.info(f"Found {len(files_to_process)} changed files to index (out of {len(all_scanned_files)} total).")
 
-    # Lazy-load analyzers per language to avoid loading unused grammars
-    analyzers: Dict[str, TreeSitterAnalyzer] = {}
-
-    def get_analyzer(lang: str) -> TreeSitterAnalyzer:
-        if lang not in analyzers:
-            analyzers[lang] = TreeSitterAnalyzer(lang)
-        return analyzers[lang]
+    batch: List["ContextItem"] = []
+    batch_files: List[str] = []
+    saved_count = 0
+
+    # Re-saved item ids and names, so the linker only revisits affected edges
+    saved_ids: Set[str] = set()
+    saved_names: Set[str] = set()
+
+    # Content digest of every changed file parsed so far, recorded with its status
+    file_digests: Dict[str, bytes] = {}
+
+    # With --semantic, the last flushed batch waiting for its embeddings:
+    # (items, files, future of the embeddings array)
+    awaiting_embeddings: List[Tuple[List["ContextItem"], List[str], Future]] = []
+
+    def write(items: List["ContextItem"], files: List[str]) -> None:
+        nonlocal saved_count
+        if items:
+            store.save(items, quantize_embeddings=args.quantize)
+            saved_count += len(items)
+            for item in items:
+                saved_ids.add(item.id)
+                saved_names.add(item.metadata.get("name"))
+        store.batch_update_file_status(
+            [(path, files_to_process[path], file_digests[path]) for path in files]
+        )
+
+    def write_embedded() -> None:
+        while awaiting_embeddings:
+            items, files, embeddings = awaiting_embeddings.pop()
+            _attach_embeddings(items, embeddings.result())
+            write(items, files)
+
+    def flush() -> None:
+        # Items are written in bounded batches, so memory does not grow with
+        # the repository and file status is only recorded once items are saved
+        items, files = batch[:], batch_files[:]
+        batch.clear()
+        batch_files.clear()
+        if args.semantic and items:
+            # The batch is encoded on the embedding thread while the next one
+            # is parsed; the previous batch is saved in the meantime
+            embeddings = _start_embeddings(items)
+            write_embedded()
+            awaiting_embeddings.append((items, files, embeddings))
+        else:
+            write_embedded()
+            write(items, files)
+
+    def consume(path_digests: Dict[str, Tuple[bytes, str]], results) -> None:
+        # Results come back in submission order, which is the order of each
+        # content's first file, so they are consumed while walking path_digests.
+        # Only contents shared by several files of the window keep their items.
+        digest_counts: Dict[bytes, int] = {}
+        for digest, _ in path_digests.values():
+            digest_counts[digest] = digest_counts.get(digest, 0) + 1
+        items_by_digest: Dict[bytes, List["ContextItem"]] = {}
+
+        for full_path, (digest, first_path) in path_digests.items():
+            if full_path == first_path:
+                current_items = next(results)
+                if digest_counts[digest] > 1:
+                    items_by_digest[digest] = current_items
+            else:
+                # Copies reuse the analysis of their first twin
+                current_items = relocate_items(items_by_digest[digest], full_path)
+            file_digests[full_path] = digest
+            progress.update(1)
 
-    items = []
-    for full_path in tqdm(files_to_process, desc="Indexing", unit="file"):
-        lang = get_language_for_file(full_path)
-        if lang:
-            current_items = get_analyzer(lang).analyze_file(full_path)
             if current_items:
-                items.extend(current_items)
-                store.update_file_status(full_path, os.path.getmtime(full_path))
+                batch.extend(current_items)
+                batch_files.append(full_path)
+                if len(batch) >= INDEX_SAVE_BATCH_SIZE:
+                    flush()
+
+    if files_to_process:
+        # Content-addressed dedup: only the first file with given bytes in a
+        # window is parsed, and files whose content matches their last index
+        # are not parsed at all. Files are read one window at a time, so memory
+        # does not grow with the total size of the changed sources.
+        known_digests = None if args.re_index else store.get_file_content_hashes()
+        paths = list(files_to_process)
+        window_starts = range(0, len(paths), INDEX_READ_WINDOW_FILES)
+        windows = (
+            _read_index_jobs(paths[start:start + INDEX_READ_WINDOW_FILES], known_digests)
+            for start in window_starts
+        )
+        first_window = next(windows)
 
-    if items:
-        # Generate vector embeddings for hybrid search (optional, slower)
         if args.semantic:
             logger.info("Generating embeddings for semantic search...")
-            embedding_service = EmbeddingService.get_instance()
 
-            batch_texts = [item.content for item in items]
-            embeddings = embedding_service.generate_embeddings(batch_texts)
-
-            if len(embeddings) != len(items):
-                logger.warning(f"Generated {len(embeddings)} embeddings for {len(items)} items")
-
-            for i, item in enumerate(items):
-                if i < len(embeddings):
-                    item.embedding = embeddings[i]
-
-        store.save(items)
-        logger.info(f"Indexed {len(items)} new/modified items.")
+        # Redraws are throttled (and skipped entirely off a terminal), so
+        # the progress bar costs nothing next to sub-millisecond parses
+        progress = tqdm(
+            total=len(paths),
+            desc="Indexing",
+            unit="file",
+            mininterval=0.2,
+            miniters=max(1, len(paths) // 200),
+            smoothing=0,
+            disable=not sys.stderr.isatty()
+        )
+
+        # Files are independent, so parsing (CPU-bound) is spread across cores.
+        # A handful of files is parsed in-process: starting workers costs more.
+        parallel = args.jobs != 1 and (
+            len(paths) > INDEX_READ_WINDOW_FILES or len(first_window[0]) >= INDEX_PARALLEL_MIN_FILES
+        )
+        unchanged_count = 0
+        with ProcessPoolExecutor(max_workers=args.jobs) if parallel else nullcontext() as executor:
+            # Each window is submitted before the previous one is consumed, so
+            # workers keep parsing while results are saved
+            in_flight = deque()
+            for start, (jobs, path_digests, unchanged) in zip(window_starts, chain([first_window], windows)):
+                # Files that could not be read are done with too, or the bar
+                # would stop short of its total
+                window_size = min(INDEX_READ_WINDOW_FILES, len(paths) - start)
+                skipped = window_size - len(path_digests)
+                if skipped:
+                    progress.update(skipped)
+                if unchanged:
+                    unchanged_count += len(unchanged)
+                    store.batch_update_file_status(
+                        [(path, files_to_process[path], digest) for path, digest in unchanged]
+                    )
+                if executor is not None:
+                    results = executor.map(_analyze_one, jobs, chunksize=INDEX_CHUNK_SIZE)
+                else:
+                    results = map(_analyze_one, jobs)
+                in_flight.append((path_digests, results))
+                if len(in_flight) > 1:
+                    consume(*in_flight.popleft())
+            while in_flight:
+                consume(*in_flight.popleft())
+
+            progress.close()
+        if unchanged_count:
+            logger.info(f"Skipped {unchanged_count} modified files with unchanged content.")
+        flush()
+        write_embedded()
+
+    if saved_count:
+        logger.info(f"Indexed {saved_count} new/modified items.")
 
         # Resolve symbolic dependencies (e.g., "UserService") to concrete item IDs
         logger.info("Updating graph links...")
+        # A forced re-index relinks everything; otherwise only what changed
         linker = GraphLinker(store)
-        linker.link()
+        if args.re_index:
+            linker.link()
+        else:
+            linker.link(changed_ids=saved_ids, changed_names=saved_names)
     else:
         logger.info("No new items found to index.")
 
 
-def _handle_search(args, store: SQLiteContextStore) -> None:
+def _start_embeddings(items: List["ContextItem"]) -> Future:
+    """Start generating vector embeddings for hybrid search (optional, slower)."""
+    from ..services.embedding_service import EmbeddingService
+
+    embedding_service = EmbeddingService.get_instance()
+
+    # Rows of the float32 array go straight to BLOB storage, no list round-trip
+    batch_texts = [item.content for item in items]
+    return embedding_service.generate_embeddings_async(batch_texts, as_numpy=True)
+
+
+def _attach_embeddings(items: List["ContextItem"], embeddings) -> None:
+    """Set each item's embedding from the generated batch (in item order)."""
+    if len(embeddings) != len(items):
+        logger.warning(f"Generated {len(embeddings)} embeddings for {len(items)} items")
+
+    for i, item in enumerate(items):
+        if i < len(embeddings):
+            item.embedding = embeddings[i]
+
+
+def _handle_search(args, store: "SQLiteContextStore") -> None:
     """
     Search the index using keywords or hybrid semantic search.
 
@@ -226,6 +653,9 @@ def _handle_search(args, store: SQLiteContextStore) -> None:
     Output is a "skeleton view" showing signatures and dependencies, not full code.
     Use the `read` command to fetch complete source code.
     """
+    from ..router.graph_router import GraphRouter
+    from ..compiler.simple_compiler import SimpleCompiler
+
     router = GraphRouter(store)
     compiler = SimpleCompiler()
 
@@ -233,6 +663,8 @@ def _handle_search(args, store: SQLiteContextStore) -> None:
 
     query_embedding = None
     if args.semantic:
+        from ..services.embedding_service import EmbeddingService
+
         logger.info("Computing query embedding...")
         service = EmbeddingService.get_instance()
         query_embedding = service.generate_embedding(args.text)
@@ -240,23 +672,27 @@ def _handle_search(args, store: SQLiteContextStore) -> None:
     items = router.route(args.text, type_filter=args.type, query_embedding=query_embedding)
     logger.info(f"Found {len(items)} items.")
 
-    prompt = compiler.compile_search_results(items, query=args.text)
-
+    # Results are streamed to the destination instead of built as one string
     if args.output:
         with open(args.output, "w", encoding="utf-8") as f:
-            f.write(prompt)
+            compiler.write_search_results(items, f, query=args.text)
         logger.info(f"Context saved to {args.output}")
     else:
-        print(prompt)
+        compiler.write_search_results(items, sys.stdout, query=args.text)
+        sys.stdout.write("\n")
 
 
-def _handle_read(args, store: SQLiteContextStore) -> None:
+def _handle_read(args, store: "SQLiteContextStore") -> None:
     """
     Fetch and display full source code for a specific indexed item.
 
     Always reads live from the filesystem to ensure freshness, falling back
     to stored content if the file was deleted or the symbol was renamed.
     """
+    from ..analyzer.ts_analyzer import TreeSitterAnalyzer, get_language_for_file
+    from ..compiler.simple_compiler import SimpleCompiler
+    from ..models.context_item import ContextItem
+
     item = store.get_by_id(args.id)
 
     if not item:
@@ -278,8 +714,8 @@ def _handle_read(args, store: SQLiteContextStore) -> None:
         fresh_content = item.content
 
         if lang and symbol_name:
-            analyzer = TreeSitterAnalyzer(lang)
-            fresh_code = analyzer.extract_code_by_symbol(item.source_file, symbol_name)
+            analyzer = TreeSitterAnalyzer.for_language(lang)
+            fresh_code = analyzer.extract_code_by_symbol(item.source_file, symbol_name, item.line_number)
 
             if fresh_code:
                 fresh_content = fresh_code
@@ -300,13 +736,15 @@ def _handle_read(args, store: SQLiteContextStore) -> None:
     print(prompt)
 
 
-def _handle_impacts(args, store: SQLiteContextStore) -> None:
+def _handle_impacts(args, store: "SQLiteContextStore") -> None:
     """
     Reverse dependency analysis: find all items that depend on a given item.
 
     Useful for impact analysis before refactoring - answers "if I change X,
     what else might break?"
     """
+    from ..compiler.simple_compiler import SimpleCompiler
+
     logger.info(f"Analyzing impacts for: {args.id}...")
     direct, cascade = store.get_cascade_dependents(args.id)
 
@@ -315,13 +753,15 @@ def _handle_impacts(args, store: SQLiteContextStore) -> None:
     print(prompt)
 
 
-def _handle_structure(args, store: SQLiteContextStore) -> None:
+def _handle_structure(args, store: "SQLiteContextStore") -> None:
     """
     Generate and display project structure overview.
 
     Outputs a compact map of the project for AI agents to understand
     the codebase organization, modules, and key components.
     """
+    from ..tools.structure import StructureGenerator
+
     generator = StructureGenerator(store)
     output = generator.generate(
         compact=args.compact,
@@ -330,5 +770,15 @@ def _handle_structure(args, store: SQLiteContextStore) -> None:
     print(output)
 
 
+# Commands that run against the store: name -> handler(args, store)
+_STORE_HANDLERS: Dict[str, Callable[[argparse.Namespace, "SQLiteContextStore"], None]] = {
+    "index": _handle_index,
+    "search": _handle_search,
+    "read": _handle_read,
+    "impacts": _handle_impacts,
+    "structure": _handle_structure,
+}
+
+
 if __name__ == "__main__":
     main()
@@ -12,10 +12,38 @@ easy for language models to parse and understand. Two output formats:
    - Used when the user needs to see implementation details
    - Code is wrapped in language-specific fenced blocks
 """
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, TextIO
 
 from ..models.context_item import ContextItem
 
+# File extension -> Markdown code fence language, for Full Mode code blocks
+_FENCE_LANGUAGES: Dict[str, str] = {
+    ".py": "python",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".jsx": "javascript",
+    ".go": "go",
+    ".rs": "rust",
+    ".java": "java",
+    ".rb": "ruby",
+    ".php": "php",
+    ".c": "c",
+    ".cpp": "cpp",
+    ".h": "c",
+    ".hpp": "cpp",
+    ".cs": "csharp",
+    ".swift": "swift",
+    ".kt": "kotlin",
+    ".scala": "scala",
+    ".sh": "bash",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".json": "json",
+    ".md": "markdown",
+    ".sql": "sql",
+}
+
 
 class SimpleCompiler:
     """
@@ -44,61 +72,86 @@ class SimpleCompiler:
             include_dependents: Whether to include reverse dependencies
             dependents_map: Dict mapping item_id -> list of dependent items
         """
-        lines: List[str] = []
+        return "\n".join(self.iter_search_results(items, query, include_dependents, dependents_map))
+
+    def write_search_results(
+        self,
+        items: List[ContextItem],
+        writer: TextIO,
+        query: Optional[str] = None,
+        include_dependents: bool = False,
+        dependents_map: Optional[dict] = None
+    ) -> None:
+        """
+        Write search results to a file-like object without building the full text.
 
+        Produces exactly what compile_search_results returns, one line at a time.
+        """
+        lines = self.iter_search_results(items, query, include_dependents, dependents_map)
+        writer.write(next(lines))
+        for line in lines:
+            writer.write("\n")
+            writer.write(line)
+
+    def iter_search_results(
+        self,
+        items: List[ContextItem],
+        query: Optional[str] = None,
+        include_dependents: bool = False,
+        dependents_map: Optional[dict] = None
+    ) -> Iterator[str]:
+        """Yield the lines of the skeleton format (see compile_search_results)."""
         # Header
         if query:
-            lines.append(f"## Search Results: \"{query}\"")
+            yield f"## Search Results: \"{query}\""
         else:
-            lines.append("## Search Results")
-        lines.append("")
+            yield "## Search Results"
+        yield ""
 
         if not items:
-            lines.append("No matches found.")
-            return "\n".join(lines)
+            yield "No matches found."
+            return
 
-        lines.append(f"### Found {len(items)} matches")
-        lines.append("")
+        yield f"### Found {len(items)} matches"
+        yield ""
 
         for i, item in enumerate(items, 1):
             item_type = item.metadata.get("type", "unknown")
             name = item.metadata.get("name", item.id.split(":")[-1])
 
             # Item header with reference
-            lines.append(f"#### {i}. `{item.id}`")
-            lines.append("")
+            yield f"#### {i}. `{item.id}`"
+            yield ""
 
             # Metadata table
-            lines.append(f"- **Type**: {item_type}")
+            yield f"- **Type**: {item_type}"
 
             # Location for IDE navigation
             if item.source_file and item.line_number:
-                lines.append(f"- **Location**: `{item.source_file}:{item.line_number}`")
+                yield f"- **Location**: `{item.source_file}:{item.line_number}`"
             elif item.source_file:
-                lines.append(f"- **Location**: `{item.source_file}`")
+                yield f"- **Location**: `{item.source_file}`"
 
-            # Signature (first line of content)
-            content_lines = item.content.split('\n')
-            if content_lines:
-                signature = content_lines[0].strip()
-                if signature:
-                    lines.append(f"- **Signature**: `{signature}`")
+            # Signature (first line of content; the rest is never split)
+            signature = item.content.partition('\n')[0].strip()
+            if signature:
+                yield f"- **Signature**: `{signature}`"
 
             # Dependencies (what this item uses)
             deps = item.metadata.get("dependencies", [])
             if deps:
-                lines.append("- **Dependencies**:")
+                yield "- **Dependencies**:"
                 for dep in deps:
-                    lines.append(f"  - `{dep}`")
+                    yield f"  - `{dep}`"
 
             # Dependents (what uses this item) - if available
             if include_dependents and dependents_map and item.id in dependents_map:
                 dependents = dependents_map[item.id]
                 if dependents:
-                    lines.append("- **Used by**:")
+                    yield "- **Used by**:"
                     for dep in dependents:
                         dep_id = dep.id if hasattr(dep, 'id') else str(dep)
-                        lines.append(f"  - `{dep_id}`")
+                        yield f"  - `{dep_id}`"
 
             # Docstring hint if present
             docstring = item.metadata.get("docstring")
@@ -106,11 +159,9 @@ class SimpleCompiler:
                 # Truncate long docstrings
                 if len(docstring) > 150:
                     docstring = docstring[:150] + "..."
-                lines.append(f"- **Description**: {docstring}")
+                yield f"- **Description**: {docstring}"
 
-            lines.append("")
-
-        return "\n".join(lines)
+            yield ""
 
     def compile_read_result(
         self,
@@ -231,35 +282,4 @@ class SimpleCompiler:
         if not source_file:
             return ""
 
-        ext_map = {
-            ".py": "python",
-            ".js": "javascript",
-            ".ts": "typescript",
-            ".tsx": "typescript",
-            ".jsx": "javascript",
-            ".go": "go",
-            ".rs": "rust",
-            ".java": "java",
-            ".rb": "ruby",
-            ".php": "php",
-            ".c": "c",
-            ".cpp": "cpp",
-            ".h": "c",
-            ".hpp": "cpp",
-            ".cs": "csharp",
-            ".swift": "swift",
-            ".kt": "kotlin",
-            ".scala": "scala",
-            ".sh": "bash",
-            ".yaml": "yaml",
-            ".yml": "yaml",
-            ".json": "json",
-            ".md": "markdown",
-            ".sql": "sql",
-        }
-
-        for ext, lang in ext_map.items():
-            if source_file.endswith(ext):
-                return lang
-
-        return ""
+        return _FENCE_LANGUAGES.get(source_file[source_file.rfind('.'):], "")
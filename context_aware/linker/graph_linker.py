@@ -13,10 +13,8 @@ This enables efficient graph traversal for the router and impacts analysis.
 The linker also calculates importance scores based on in-degree centrality
 (how many other items depend on each item).
 """
-import json
 import logging
-import math
-from typing import Dict, List, Set, Tuple
+from typing import Dict, FrozenSet, Optional, Set
 
 from ..store.sqlite_store import SQLiteContextStore
 
@@ -24,7 +22,7 @@ logger = logging.getLogger(__name__)
 
 # Python standard library modules - these are never resolved to local items
 # Used to avoid false positives when "json" or "os" appears as a dependency
-PYTHON_STDLIB: Set[str] = {
+PYTHON_STDLIB: FrozenSet[str] = frozenset({
     'abc', 'argparse', 'ast', 'asyncio', 'base64', 'collections',
     'contextlib', 'copy', 'csv', 'datetime', 'decimal', 'enum',
     'functools', 'hashlib', 'hmac', 'importlib', 'inspect', 'io',
@@ -34,7 +32,7 @@ PYTHON_STDLIB: Set[str] = {
     'subprocess', 'sys', 'tempfile', 'threading', 'time', 'traceback',
     'typing', 'unittest', 'urllib', 'uuid', 'warnings', 'weakref',
     'zipfile', 'zlib'
-}
+})
 
 
 class GraphLinker:
@@ -79,7 +77,11 @@ class GraphLinker:
 
         return False
 
-    def link(self) -> None:
+    def link(
+        self,
+        changed_ids: Optional[Set[str]] = None,
+        changed_names: Optional[Set[str]] = None
+    ) -> None:
         """
         Main linking algorithm: resolve all unresolved edges to concrete item IDs.
 
@@ -89,84 +91,66 @@ class GraphLinker:
           3. If multiple matches, use path heuristics to pick the best one
           4. Mark external dependencies (stdlib, npm packages) as such
 
-        After linking, runs score calculation for search ranking.
+        Steps 1-3 run inside SQLite as a single UPDATE (see
+        SQLiteContextStore.link_edges_by_name); only the edges left
+        unresolved come back to be classified for the report.
+
+        Incremental mode (changed_ids given, after an incremental index): only
+        edges from the re-saved items, or whose short name matches a re-saved
+        item, are processed. Any other unresolved edge was already tried by an
+        earlier link and no new candidate for it exists, so the result is the
+        same as a full link without revisiting every external import.
+
+        After linking, runs score calculation for search ranking, in the
+        same transaction as the edge updates - also when no edge needed
+        linking, since the re-saved items lost their scores. With no changed
+        items at all there is nothing to relink or rescore.
         """
         logger.info("Linking graph nodes...")
 
-        unresolved = self.store.get_unresolved_edges()
-
-        if not unresolved:
+        if changed_ids is not None and not changed_ids and not changed_names:
             logger.info("Graph is fully linked.")
             return
 
-        resolved_count = 0
-        external_count = 0
-        truly_unresolved_count = 0
-
-        # Build lookup table: symbol name -> list of (item_id, source_file)
-        # This allows O(1) name lookup during resolution
-        items_metadata = self.store.get_all_items_metadata()
-        name_map: Dict[str, List[Tuple[str, str]]] = {}
-
-        for item_id, metadata_json, source_file in items_metadata:
-            source_file = source_file or ""
-            try:
-                meta = json.loads(metadata_json)
-                name = meta.get("name")
-                if name:
-                    if name not in name_map:
-                        name_map[name] = []
-                    name_map[name].append((item_id, source_file))
-            except json.JSONDecodeError as e:
-                logger.warning(f"Could not parse metadata for item {item_id}: {e}")
-
-        updates: List[Tuple[str, int]] = []
-
-        for rowid, target_key in unresolved:
-            if not target_key:
-                logger.warning("Empty target_key encountered in graph linking")
-                truly_unresolved_count += 1
-                continue
-
-            # Extract short name: "inventory.InventoryService" -> "InventoryService"
-            key_parts = target_key.rsplit('.', 2)
-            short_name = key_parts[-1]
-
-            candidates = name_map.get(short_name)
-            if candidates:
-                target_id = None
-
-                # Disambiguation: if target_key looks like a path (inventory.InventoryService),
-                # prefer the candidate whose file path contains "inventory"
-                if len(candidates) > 1 and len(key_parts) > 1:
-                    path_fragment = key_parts[-2].lower()
-                    for cid, cpath in candidates:
-                        if path_fragment in cpath.lower():
-                            target_id = cid
-                            break
-
-                # Default: use first match
-                if not target_id:
-                    target_id = candidates[0][0]
-
-                updates.append((target_id, rowid))
-                resolved_count += 1
-            else:
-                if self.is_external(target_key):
+        # Edges above are resolved and their scores recomputed in one transaction:
+        # one commit, and never links without matching scores
+        with self.store.transaction():
+            resolved_count, unresolved_keys = self.store.link_edges_by_name(changed_ids, changed_names)
+            total_processed = resolved_count + len(unresolved_keys)
+
+            if not total_processed:
+                logger.info("Graph is fully linked.")
+                # Re-saved items were written with score 0, and their in-degree
+                # may come entirely from edges of files that did not change
+                self._calculate_scores()
+                return
+
+            # Classify what stayed unresolved; each distinct key only once
+            external_count = 0
+            truly_unresolved_count = 0
+            external_by_key: Dict[str, bool] = {}
+
+            for target_key in unresolved_keys:
+                if not target_key:
+                    logger.warning("Empty target_key encountered in graph linking")
+                    truly_unresolved_count += 1
+                    continue
+
+                external = external_by_key.get(target_key)
+                if external is None:
+                    external = external_by_key[target_key] = self.is_external(target_key)
+                if external:
                     external_count += 1
                 else:
                     truly_unresolved_count += 1
 
-        if updates:
-            self.store.batch_update_edge_targets(updates)
-
-        logger.info("Graph Linking Report:")
-        logger.info(f"  - Internal Linked:   {resolved_count}")
-        logger.info(f"  - External/StdLib:   {external_count}")
-        logger.info(f"  - Unresolved:        {truly_unresolved_count}")
-        logger.info(f"  (Total Processed: {len(unresolved)})")
+            logger.info("Graph Linking Report:")
+            logger.info(f"  - Internal Linked:   {resolved_count}")
+            logger.info(f"  - External/StdLib:   {external_count}")
+            logger.info(f"  - Unresolved:        {truly_unresolved_count}")
+            logger.info(f"  (Total Processed: {total_processed})")
 
-        self._calculate_scores()
+            self._calculate_scores()
 
     def _calculate_scores(self) -> None:
         """
@@ -179,14 +163,6 @@ class GraphLinker:
         """
         logger.info("Calculating importance scores...")
 
-        indegree_counts = self.store.get_indegree_counts()
-
-        scores: List[Tuple[float, str]] = []
-        for target_id, degree in indegree_counts:
-            score = math.log(1 + degree)
-            scores.append((score, target_id))
-
-        if scores:
-            self.store.batch_update_scores(scores)
+        self.store.update_indegree_scores()
 
         logger.info("Scoring complete.")
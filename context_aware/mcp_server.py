@@ -246,8 +246,8 @@ def _handle_read(store: SQLiteContextStore, arguments: Any) -> ToolResult:
         lang = get_language_for_file(item.source_file)
 
         if lang and symbol_name:
-            analyzer = TreeSitterAnalyzer(lang)
-            code = analyzer.extract_code_by_symbol(item.source_file, symbol_name)
+            analyzer = TreeSitterAnalyzer.for_language(lang)
+            code = analyzer.extract_code_by_symbol(item.source_file, symbol_name, item.line_number)
             if code:
                 fresh_content = code
 
@@ -305,7 +305,7 @@ async def run_mcp_server(root_dir: str) -> None:
     Async entry point for the MCP server.
 
     Initializes the store (with locking to prevent races) and starts
-    the stdio-based MCP protocol handler.
+    the stdio-based MCP protocol handler on a persistent store connection.
     """
     if _state.initialization_lock is None:
         _state.initialization_lock = asyncio.Lock()
@@ -316,12 +316,15 @@ async def run_mcp_server(root_dir: str) -> None:
             _state.store = SQLiteContextStore(root_dir=root_dir)
             _state.store_ready.set()
 
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options()
-        )
+    # One connection for the server's lifetime: its page cache and memory map
+    # stay warm across tool calls instead of being rebuilt for every query
+    with _state.store:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options()
+            )
 
 
 def start_mcp(root_dir: str) -> None:
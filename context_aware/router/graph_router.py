@@ -8,17 +8,21 @@ ContextAware more useful than plain grep.
 Search Flow:
   1. Execute initial search (FTS or hybrid semantic)
   2. For each result, follow outbound edges to find dependencies
-  3. Recursively expand up to `depth` levels
+  3. Recursively expand up to `depth` levels (one recursive SQL query)
   4. Return all relevant items (deduped)
 
 This "graph-aware" search means that if you search for "UserController",
 you also get the UserService it depends on, which provides better context.
 """
-from typing import Dict, List, Optional, Set
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 from ..store.sqlite_store import SQLiteContextStore
 from ..models.context_item import ContextItem
 
+# Keyword-search results remembered by GraphRouter (agents often repeat a query)
+ROUTE_CACHE_SIZE = 256
+
 
 class GraphRouter:
     """
@@ -26,11 +30,23 @@ class GraphRouter:
 
     Unlike a plain text search, the router follows the dependency graph to
     include related items, giving LLMs a more complete picture of the code.
+
+    Keyword searches are cached across router instances as ordered item ids,
+    keyed by the query and the database's data version, so any write to the
+    index invalidates them.
     """
 
+    # (db_path, data version, query, type_filter, depth) -> result item ids, LRU order
+    _route_cache: "OrderedDict[Tuple, List[str]]" = OrderedDict()
+
     def __init__(self, store: SQLiteContextStore):
         self.store = store
 
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forget all cached search results."""
+        cls._route_cache.clear()
+
     def route(
         self,
         query: str,
@@ -51,6 +67,16 @@ class GraphRouter:
             List of matching items plus their dependencies (deduped)
         """
         with self.store:
+            # Semantic searches are not cached: the embedding is not a hashable key
+            cache_key = None
+            if not query_embedding:
+                cache_key = (self.store.db_path, self.store.get_data_version(), query, type_filter, depth)
+                cached_ids = self._route_cache.get(cache_key)
+                if cached_ids is not None:
+                    self._route_cache.move_to_end(cache_key)
+                    by_id = {item.id: item for item in self.store.get_items_by_ids(cached_ids)}
+                    return [by_id[item_id] for item_id in cached_ids if item_id in by_id]
+
             # Step 1: Initial search - find direct matches
             if query_embedding:
                 initial_hits = self.store.search_hybrid(
@@ -62,52 +88,25 @@ class GraphRouter:
                 initial_hits = self.store.query(query, type_filter=type_filter)
 
             if not initial_hits:
+                self._remember(cache_key, [])
                 return []
 
             # Use dict for O(1) deduplication while preserving items
             final_items: Dict[str, ContextItem] = {item.id: item for item in initial_hits}
 
-            # Step 2: Graph expansion - follow dependencies to related items
-            current_layer_ids: List[str] = [item.id for item in initial_hits]
-
-            for _ in range(depth):
-                if not current_layer_ids:
-                    break
-
-                edges = self.store.get_outbound_edges(current_layer_ids)
-                if not edges:
-                    break
-
-                next_layer_ids: List[str] = []
-                ids_to_fetch: Set[str] = set()
-                names_to_resolve: Set[str] = set()
-
-                for _, target_key, target_id in edges:
-                    if target_id:
-                        # Resolved edge: we know the exact target item
-                        if target_id not in final_items:
-                            ids_to_fetch.add(target_id)
-                    elif target_key:
-                        # Unresolved edge: try name-based lookup as fallback
-                        name = target_key.split('.')[-1]
-                        names_to_resolve.add(name)
-
-                # Batch fetch by ID (fast - direct lookup)
-                if ids_to_fetch:
-                    fetched_items = self.store.get_items_by_ids(ids_to_fetch)
-                    for item in fetched_items:
-                        if item.id not in final_items:
-                            final_items[item.id] = item
-                            next_layer_ids.append(item.id)
-
-                # Batch fetch by name (slower - metadata scan)
-                if names_to_resolve:
-                    resolved_items = self.store.get_items_by_name(names_to_resolve)
-                    for item in resolved_items:
-                        if item.id not in final_items:
-                            final_items[item.id] = item
-                            next_layer_ids.append(item.id)
-
-                current_layer_ids = next_layer_ids
+            # Step 2: Graph expansion - follow dependencies to related items.
+            # The whole walk runs in SQLite; returned items are new and deduped.
+            for item in self.store.traverse_outbound(list(final_items), depth):
+                final_items[item.id] = item
 
+            self._remember(cache_key, list(final_items))
             return list(final_items.values())
+
+    def _remember(self, cache_key: Optional[Tuple], item_ids: List[str]) -> None:
+        """Cache a search's result ids, evicting the least recently used entry."""
+        if cache_key is None:
+            return
+        cache = self._route_cache
+        cache[cache_key] = item_ids
+        if len(cache) > ROUTE_CACHE_SIZE:
+            cache.popitem(last=False)
@@ -14,12 +14,22 @@ The service is a thread-safe singleton with LRU caching to avoid
 recomputing embeddings for frequently-searched queries.
 """
 import logging
+import os
 import threading
 from collections import OrderedDict
-from typing import List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Union
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Texts encoded per model forward pass. encode() sorts texts by length before
+# batching, so larger batches add little padding; override with
+# CONTEXT_AWARE_EMBED_BATCH_SIZE (e.g. lower on small GPUs, higher on big ones)
+EMBEDDING_BATCH_SIZE = 64
+
 
 class EmbeddingService:
     """
@@ -68,6 +78,9 @@ class EmbeddingService:
         # OrderedDict maintains insertion order for LRU eviction
         self._embedding_cache: OrderedDict = OrderedDict()
         self._cache_max_size = 1024
+        # Single encode thread for generate_embeddings_async (created on first use)
+        self._encode_executor: Optional[ThreadPoolExecutor] = None
+        self._encode_executor_lock = threading.Lock()
 
     def _load_model(self):
         """
@@ -87,12 +100,21 @@ class EmbeddingService:
             self._model = None
         self._model_loaded = True
 
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings(
+        self,
+        texts: List[str],
+        as_numpy: bool = False
+    ) -> Union[List[List[float]], "np.ndarray"]:
         """
         Generate embeddings for multiple texts in batch.
 
         Batching is more efficient than single-text calls because it
-        allows the model to parallelize computation on GPU/CPU.
+        allows the model to parallelize computation on GPU/CPU. Texts are
+        fed to the model in batches of EMBEDDING_BATCH_SIZE.
+
+        Vectors are L2-normalized, so cosine similarity is a plain dot product.
+        With as_numpy=True the float32 (N, dim) array is returned as is,
+        skipping the conversion to N lists of Python floats.
         """
         if not self._model:
             return []
@@ -100,8 +122,29 @@ class EmbeddingService:
         if not texts:
             return []
 
-        embeddings = self._model.encode(texts, show_progress_bar=False)
-        return embeddings.tolist()
+        embeddings = self._model.encode(
+            texts,
+            batch_size=_embedding_batch_size(),
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return embeddings if as_numpy else embeddings.tolist()
+
+    def generate_embeddings_async(self, texts: List[str], as_numpy: bool = False) -> Future:
+        """
+        Queue generate_embeddings(texts, as_numpy) and return its Future.
+
+        Batches run one at a time, in submission order, on one background
+        thread. The model's forward pass releases the GIL, so callers can
+        parse or write to the database while a batch is encoded.
+        """
+        with self._encode_executor_lock:
+            if self._encode_executor is None:
+                self._encode_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="embedding-encode"
+                )
+        return self._encode_executor.submit(self.generate_embeddings, texts, as_numpy)
 
     def generate_embedding(self, text: str) -> Optional[List[float]]:
         """
@@ -136,3 +179,18 @@ class EmbeddingService:
             "size": len(self._embedding_cache),
             "max_size": self._cache_max_size
         }
+
+
+def _embedding_batch_size() -> int:
+    """EMBEDDING_BATCH_SIZE, unless overridden by CONTEXT_AWARE_EMBED_BATCH_SIZE."""
+    value = os.environ.get("CONTEXT_AWARE_EMBED_BATCH_SIZE")
+    if value is None:
+        return EMBEDDING_BATCH_SIZE
+    try:
+        batch_size = int(value)
+    except ValueError:
+        batch_size = 0
+    if batch_size < 1:
+        logger.warning(f"Ignoring invalid CONTEXT_AWARE_EMBED_BATCH_SIZE={value!r}")
+        return EMBEDDING_BATCH_SIZE
+    return batch_size
@@ -13,15 +13,19 @@ Database location: .context_aware/context.db (relative to project root)
 Schema overview:
   - items: Main table storing indexed symbols
   - edges: Dependency relationships between items
-  - tracked_files: Modification times for incremental indexing
-  - items_fts: FTS5 virtual table for full-text search
+  - tracked_files: Modification times and content hashes for incremental indexing
+  - items_fts: FTS5 index over items (external content, kept in sync by triggers)
 """
+import itertools
 import json
 import logging
+import math
 import os
+import re
 import sqlite3
+from collections import OrderedDict
 from contextlib import contextmanager
-from typing import Iterable, List, Optional, Tuple, TYPE_CHECKING
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
 
 from ..models.context_item import ContextItem, ContextLayer
 
@@ -45,35 +49,104 @@ def _get_numpy():
             )
     return _np
 
+# Optional orjson (pip install context-aware[fast]): a C codec for the metadata
+# JSON written by save() and parsed for every row read; stdlib json otherwise
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to a JSON string, with orjson when it is installed."""
+    if _orjson is not None:
+        return _orjson.dumps(obj, option=_orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+_json_loads = _orjson.loads if _orjson is not None else json.loads
+
+# Optional SimSIMD (pip install context-aware[fast]): SIMD cosine kernels
+# (AVX-512/NEON) for search_hybrid's brute-force scan; numpy BLAS otherwise
+try:
+    import simsimd as _simsimd
+except ImportError:
+    _simsimd = None
+
 logger = logging.getLogger(__name__)
 
+# Words of a search query: each becomes one quoted FTS5 prefix term. Only word
+# characters survive, so no query can inject FTS5 syntax or fail to parse.
+_FTS_WORD_PATTERN = re.compile(r"\w+")
+
+# Per-connection tuning for a read-heavy workload: a 64 MiB page cache
+# (negative = KiB), temp structures in memory, and the database file
+# memory-mapped up to 256 MiB so reads skip pread() syscalls.
+# Set CONTEXT_AWARE_SQLITE_MMAP=0 to disable memory-mapping.
+SQLITE_CACHE_SIZE_KIB = 65536
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+# Bound parameters per `IN (?, ...)` list, below SQLite's historical limit of
+# 999 host parameters (SQLITE_MAX_VARIABLE_NUMBER) on older builds
+SQLITE_MAX_IN_PARAMS = 900
+
+# Compiled statements kept per connection by sqlite3 (default 128). Chunked
+# IN (...) lookups add one SQL text per distinct chunk size; the extra room
+# keeps them from evicting the fixed hot-path statements in long sessions.
+SQLITE_CACHED_STATEMENTS = 256
+
+# Databases whose normalized embedding matrix search_hybrid keeps in memory
+# (N x D float32 each), so vector search does not decode every BLOB per query
+VECTOR_CACHE_SIZE = 4
+
+# Tags each persistent connection: PRAGMA data_version values only compare on one
+_CONNECTION_SERIALS = itertools.count(1)
+
 
 class SQLiteContextStore:
     """
     Persistent storage layer using SQLite.
 
-    Supports two usage patterns:
+    Supports three usage patterns:
       1. Context manager: `with store:` - keeps connection open for batched ops
+         (blocks may nest; the outermost one opens and closes the connection)
       2. Method calls: Each method opens/closes its own connection
+      3. `with store.transaction():` - the writes of several method calls are
+         committed (or rolled back) together, once, at the end of the block
 
     The context manager pattern is preferred for operations that make
     multiple queries, as it avoids connection overhead.
     """
 
+    # db_path -> (data version, ids, id positions, types, unit-norm matrix,
+    # nonzero-row mask), shared by all stores; used only while the version matches
+    _vector_cache: "OrderedDict[str, Tuple]" = OrderedDict()
+    # db_path -> writes made through any store in this process
+    _write_counts: Dict[str, int] = {}
+
     def __init__(self, root_dir: str = "."):
         self.storage_dir = os.path.join(root_dir, ".context_aware")
         self.db_path = os.path.join(self.storage_dir, "context.db")
         self._conn: Optional[sqlite3.Connection] = None
+        self._conn_serial = 0
+        # Open `with store:` blocks sharing self._conn
+        self._conn_depth = 0
+        self._in_transaction = False
         self._ensure_storage()
 
     def __enter__(self) -> "SQLiteContextStore":
-        """Open a persistent connection for batched operations."""
-        self._conn = sqlite3.connect(self.db_path)
+        """Open a persistent connection for batched operations, or join the open one."""
+        if self._conn_depth == 0 and self._conn is None:
+            self._conn = self._connect()
+            self._conn_serial = next(_CONNECTION_SERIALS)
+        self._conn_depth += 1
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
-        """Close the persistent connection."""
-        if self._conn:
+        """Close the persistent connection when the outermost block exits."""
+        self._conn_depth -= 1
+        if self._conn_depth == 0 and self._conn is not None and not self._in_transaction:
             self._conn.close()
             self._conn = None
 
@@ -88,12 +161,69 @@ class SQLiteContextStore:
         if self._conn is not None:
             yield self._conn
         else:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 yield conn
             finally:
                 conn.close()
 
+    @contextmanager
+    def transaction(self):
+        """
+        Run the writes of several store calls as one transaction.
+
+        Methods called inside the block skip their own commit; the block commits
+        once on exit, or rolls everything back if it raises. BEGIN IMMEDIATE
+        takes the write lock up front, so a concurrent writer fails fast instead
+        of deadlocking a read-then-write upgrade. Uses the persistent connection
+        if one is open, otherwise opens one for the block.
+        """
+        if self._in_transaction:
+            yield self
+            return
+
+        owns_connection = self._conn is None
+        if owns_connection:
+            self._conn = self._connect()
+            self._conn_serial = next(_CONNECTION_SERIALS)
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        self._in_transaction = True
+        try:
+            yield self
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            self._in_transaction = False
+            if owns_connection:
+                conn.close()
+                self._conn = None
+
+    def _commit(self, conn: sqlite3.Connection) -> None:
+        """Commit a method's writes, unless they belong to an enclosing transaction()."""
+        self._write_counts[self.db_path] = self._write_counts.get(self.db_path, 0) + 1
+        if not self._in_transaction:
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the database with the per-connection PRAGMAs applied."""
+        conn = sqlite3.connect(self.db_path, cached_statements=SQLITE_CACHED_STATEMENTS)
+        # WAL makes NORMAL sync safe: commits skip the fsync until checkpoint
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # save() upserts with INSERT OR REPLACE; its implicit delete must fire
+        # the items_ad trigger, or the FTS index would keep the replaced row
+        conn.execute("PRAGMA recursive_triggers=ON")
+        # Enforces edges -> items, whose ON DELETE CASCADE removes an item's edges
+        conn.execute("PRAGMA foreign_keys=ON")
+        if os.environ.get("CONTEXT_AWARE_SQLITE_MMAP", "1") != "0":
+            conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        return conn
+
     def _ensure_storage(self) -> None:
         """
         Initialize the database schema if it doesn't exist.
@@ -102,66 +232,189 @@ class SQLiteContextStore:
         This is called on every store instantiation but is idempotent.
         """
         os.makedirs(self.storage_dir, exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         try:
             cursor = conn.cursor()
 
+            # Write-ahead logging is a persistent property of the database file:
+            # readers (search, MCP server) no longer block on a running index
+            cursor.execute("PRAGMA journal_mode=WAL")
+
             # Main items table - stores all indexed symbols
             # id format: "type:filename:symbolname" (e.g., "class:user.py:User")
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS items (
-                    id TEXT PRIMARY KEY,
+            # rowid: declared INTEGER PRIMARY KEY so VACUUM keeps the values the
+            #   FTS index refers to (an implicit rowid may be renumbered); last,
+            #   so SELECT * rows still start with the columns _row_to_item reads
+            items_columns = '''(
+                    id TEXT NOT NULL UNIQUE,
                     layer TEXT,
                     content TEXT,
                     metadata TEXT,
                     source_file TEXT,
                     line_number INTEGER,
                     score REAL DEFAULT 0,
-                    embedding BLOB
-                )
-            ''')
-
-            # Schema migration: add embedding column if missing (for upgrades)
+                    embedding BLOB,
+                    embedding_scale REAL,
+                    rowid INTEGER PRIMARY KEY
+                )'''
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS items {items_columns}')
+
+            # Schema migration: add embedding columns if missing (for upgrades)
+            # embedding_scale: NULL for float32 embeddings; for int8-quantized
+            #   ones, the factor that maps the stored int8 values back to floats
             cursor.execute("PRAGMA table_info(items)")
             columns = [info[1] for info in cursor.fetchall()]
             if "embedding" not in columns:
                 cursor.execute("ALTER TABLE items ADD COLUMN embedding BLOB")
+            if "embedding_scale" not in columns:
+                cursor.execute("ALTER TABLE items ADD COLUMN embedding_scale REAL")
+
+            # Schema migration: rebuild items with an explicit rowid column (for
+            # upgrades), copying the implicit rowids the FTS index refers to.
+            # Foreign keys are off for the swap, or dropping the old table would
+            # cascade into edges; its indexes and triggers are recreated below.
+            if "rowid" not in columns:
+                conn.commit()
+                cursor.execute("PRAGMA foreign_keys=OFF")
+                try:
+                    cursor.execute("BEGIN")
+                    cursor.execute(f'CREATE TABLE items_migrated {items_columns}')
+                    cursor.execute('''
+                        INSERT INTO items_migrated (rowid, id, layer, content, metadata, source_file, line_number, score, embedding, embedding_scale)
+                        SELECT rowid, id, layer, content, metadata, source_file, line_number, score, embedding, embedding_scale FROM items
+                    ''')
+                    cursor.execute('DROP TABLE items')
+                    cursor.execute('ALTER TABLE items_migrated RENAME TO items')
+                    conn.commit()
+                finally:
+                    cursor.execute("PRAGMA foreign_keys=ON")
 
             # Edges table: stores the dependency graph
             # target_key: symbolic reference (e.g., "UserService")
             # target_id: resolved item ID (filled by GraphLinker)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS edges (
+            # target_short: last dotted component of target_key, the name the
+            #   linker resolves ("models.User" -> "User")
+            # Deleting (or replacing) an item deletes its outgoing edges
+            edges_columns = '''(
                     source_id TEXT,
                     target_key TEXT,
                     target_id TEXT,
                     relation_type TEXT,
+                    target_short TEXT,
                     PRIMARY KEY (source_id, target_key, relation_type),
-                    FOREIGN KEY(source_id) REFERENCES items(id)
-                )
-            ''')
+                    FOREIGN KEY(source_id) REFERENCES items(id) ON DELETE CASCADE
+                )'''
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS edges {edges_columns}')
+
+            # Schema migration: add and backfill target_short if missing (for upgrades).
+            # rtrim() strips every trailing non-dot character, leaving the key up
+            # to its last '.', so the substr after it is the last component.
+            cursor.execute("PRAGMA table_info(edges)")
+            if "target_short" not in [info[1] for info in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE edges ADD COLUMN target_short TEXT")
+                cursor.execute('''
+                    UPDATE edges
+                    SET target_short = substr(target_key, length(rtrim(target_key, replace(target_key, '.', ''))) + 1)
+                ''')
+
+            # Schema migration: rebuild edges without ON DELETE CASCADE (for upgrades).
+            # Constraints cannot be altered in place; edges of missing items are dropped.
+            cursor.execute("PRAGMA foreign_key_list(edges)")
+            if not any(fk[2] == "items" and fk[6] == "CASCADE" for fk in cursor.fetchall()):
+                cursor.execute('SELECT COUNT(*) FROM edges')
+                edge_count = cursor.fetchone()[0]
+                cursor.execute(f'CREATE TABLE edges_migrated {edges_columns}')
+                cursor.execute('''
+                    INSERT INTO edges_migrated (source_id, target_key, target_id, relation_type, target_short)
+                    SELECT source_id, target_key, target_id, relation_type, target_short FROM edges
+                    WHERE source_id IN (SELECT id FROM items)
+                    ORDER BY rowid
+                ''')
+                if cursor.rowcount < edge_count:
+                    logger.warning(f"Dropped {edge_count - cursor.rowcount} edges of missing items while migrating the edges table")
+                cursor.execute('DROP TABLE edges')
+                cursor.execute('ALTER TABLE edges_migrated RENAME TO edges')
 
             # Indexes optimized for common access patterns
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_edges_target ON edges(target_key)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_edges_target_id ON edges(target_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_edges_source_target ON edges(source_id, target_id)')
+            # Covering index for following edges into an item: get_inbound_edge_ids
+            # and the in-degree scores read it alone, never the table rows
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_edges_inbound ON edges(target_id, source_id)')
+            # Covering index for following edges out of an item (traverse_outbound
+            # reads all three columns from the index, never the table rows)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_edges_outbound ON edges(source_id, target_id, target_short)')
+            # Superseded: nothing filters on target_key any more (the linker
+            # matches target_short), (source_id, target_id) is a prefix of
+            # idx_edges_outbound and (target_id) a prefix of idx_edges_inbound
+            cursor.execute('DROP INDEX IF EXISTS idx_edges_target')
+            cursor.execute('DROP INDEX IF EXISTS idx_edges_source_target')
+            cursor.execute('DROP INDEX IF EXISTS idx_edges_target_id')
+            # Partial index: only unresolved edges, looked up by the name they need
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_edges_unresolved_short ON edges(target_short) WHERE target_id IS NULL')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_items_source_file ON items(source_file)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_items_layer ON items(layer)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_items_score ON items(score DESC)')
 
+            # Expression index for type filters (json_extract instead of a LIKE scan)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_type ON items(json_extract(metadata, '$.type'))")
+            # Name lookups against edges.target_short write it as +target_short:
+            # unary + drops the column's TEXT affinity, which would otherwise keep
+            # the comparison off this index (a scan per edge)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_name ON items(json_extract(metadata, '$.name'))")
+
             # File tracking for incremental indexing (skip unchanged files)
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS tracked_files (
                     path TEXT PRIMARY KEY,
-                    last_modified REAL
+                    last_modified REAL,
+                    content_hash BLOB
                 )
             ''')
 
-            # FTS5 for fast full-text search (falls back to LIKE if unavailable)
+            # Schema migration: add content_hash column if missing (for upgrades)
+            cursor.execute("PRAGMA table_info(tracked_files)")
+            if "content_hash" not in [info[1] for info in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE tracked_files ADD COLUMN content_hash BLOB")
+
+            # FTS5 for fast full-text search (falls back to LIKE if unavailable).
+            # External content: the index reads id, content and metadata from
+            # items by rowid instead of storing a second copy of every row, and
+            # the triggers below keep it in sync with items. (items.rowid is an
+            # INTEGER PRIMARY KEY, so VACUUM leaves the rowids it relies on alone.)
             try:
+                cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'items_fts'")
+                row = cursor.fetchone()
+                if row and "content=" not in row[0]:
+                    # Schema migration: replace the self-contained FTS table (for upgrades)
+                    cursor.execute("DROP TABLE items_fts")
+                    row = None
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts
+                    USING fts5(id, content, metadata, content='items', content_rowid='rowid')
+                ''')
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+                        INSERT INTO items_fts (rowid, id, content, metadata)
+                        VALUES (new.rowid, new.id, new.content, new.metadata);
+                    END
+                ''')
                 cursor.execute('''
-                    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(id, content, metadata)
+                    CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+                        INSERT INTO items_fts (items_fts, rowid, id, content, metadata)
+                        VALUES ('delete', old.rowid, old.id, old.content, old.metadata);
+                    END
                 ''')
+                # Score updates leave the indexed columns alone and skip the trigger
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE OF id, content, metadata ON items BEGIN
+                        INSERT INTO items_fts (items_fts, rowid, id, content, metadata)
+                        VALUES ('delete', old.rowid, old.id, old.content, old.metadata);
+                        INSERT INTO items_fts (rowid, id, content, metadata)
+                        VALUES (new.rowid, new.id, new.content, new.metadata);
+                    END
+                ''')
+                if row is None:
+                    # New (or migrated) index: build it from the rows already in items
+                    cursor.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
             except sqlite3.OperationalError:
                 logger.warning("FTS5 not available. Fallback to LIKE query.")
 
@@ -185,12 +438,15 @@ class SQLiteContextStore:
         Sanitize user input for safe FTS5 MATCH queries.
 
         FTS5 has special syntax characters that could cause errors or
-        unexpected behavior. We strip them and wrap in quotes for phrase matching.
+        unexpected behavior. Only the words of the query (runs of word
+        characters) are kept, each quoted as a prefix term: every word must
+        match the start of a token, in any order, so "stock check" finds
+        check_stock and "User" finds UserService. No words: matches nothing.
         """
-        for char in ['"', '*', '+', '-', '^', ':', '(', ')']:
-            query_text = query_text.replace(char, ' ')
-        query_text = ' '.join(query_text.split())
-        return f'"{query_text}"'
+        words = _FTS_WORD_PATTERN.findall(query_text)
+        if not words:
+            return '""'
+        return ' '.join(f'"{word}"*' for word in words)
 
     def _sanitize_like_query(self, query_text: str) -> str:
         """Escape LIKE wildcards to prevent pattern injection."""
@@ -199,60 +455,88 @@ class SQLiteContextStore:
         query_text = query_text.replace('_', '\\_')
         return query_text
 
-    def save(self, items: List[ContextItem]) -> None:
+    def save(self, items: Iterable[ContextItem], quantize_embeddings: bool = False) -> None:
         """
         Persist a batch of ContextItems to the database.
 
+        With quantize_embeddings, embeddings are stored as int8 (a quarter of
+        the float32 size) with a per-vector scale; cosine scores barely move.
+
         For each item:
-          1. Upsert into items table (with optional embedding)
-          2. Update FTS index for search
-          3. Create edges for declared dependencies
+          1. Upsert into items table (with optional embedding); the FTS index
+             follows through the items triggers, and replacing an item
+             cascades to its old edges
+          2. Create edges for declared dependencies
+
+        Rows are written with one executemany per statement instead of one
+        execute per item and dependency.
         """
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        # If an id repeats, the last item wins and keeps its place in the
+        # order (as with row-by-row upserts), so each id is written once
+        latest = {}
+        for item in reversed(list(items)):
+            latest.setdefault(item.id, item)
+        batch = list(reversed(latest.values()))
+        if not batch:
+            return
 
-            for item in items:
-                meta_json = json.dumps(item.metadata)
+        item_rows = []
+        edge_rows = []
+        for item in batch:
+            meta_json = _json_dumps(item.metadata)
 
-                # Convert embedding list to binary blob for storage
-                embedding_blob = None
-                if item.embedding:
-                    np = _get_numpy()
-                    arr = np.array(item.embedding, dtype=np.float32)
-                    embedding_blob = arr.tobytes()
+            # Convert embedding (list or float32 array row) to binary blob for storage
+            embedding_blob = None
+            embedding_scale = None
+            if item.embedding is not None and len(item.embedding):
+                np = _get_numpy()
+                arr = np.asarray(item.embedding, dtype=np.float32)
+                if quantize_embeddings:
+                    arr, embedding_scale = _quantize_int8(arr)
+                embedding_blob = arr.tobytes()
 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO items (id, layer, content, metadata, source_file, line_number, score, embedding)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (item.id, item.layer.value, item.content, meta_json, item.source_file, item.line_number, 0.0, embedding_blob))
+            item_rows.append((
+                item.id, item.layer.value, item.content, meta_json, item.source_file,
+                item.line_number, 0.0, embedding_blob, embedding_scale
+            ))
 
-                # Keep FTS in sync (delete + insert for upsert semantics)
-                cursor.execute('DELETE FROM items_fts WHERE id = ?', (item.id,))
-                cursor.execute('''
-                    INSERT INTO items_fts (id, content, metadata)
-                    VALUES (?, ?, ?)
-                ''', (item.id, item.content, meta_json))
+            # Edge records for dependencies (target_id filled later by linker)
+            for dep in item.metadata.get("dependencies", []):
+                if dep:
+                    edge_rows.append((item.id, dep, None, "import", dep.rpartition('.')[2]))
 
-                # Create edge records for dependencies (target_id filled later by linker)
-                cursor.execute('DELETE FROM edges WHERE source_id = ?', (item.id,))
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
 
-                deps = item.metadata.get("dependencies", [])
-                for dep in deps:
-                    if dep:
-                        cursor.execute('''
-                            INSERT OR IGNORE INTO edges (source_id, target_key, target_id, relation_type)
-                            VALUES (?, ?, ?, ?)
-                        ''', (item.id, dep, None, "import"))
+            cursor.executemany('''
+                INSERT OR REPLACE INTO items (id, layer, content, metadata, source_file, line_number, score, embedding, embedding_scale)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', item_rows)
 
-            conn.commit()
+            # Old outgoing edges went with the replaced rows (ON DELETE CASCADE)
+            cursor.executemany('''
+                INSERT OR IGNORE INTO edges (source_id, target_key, target_id, relation_type, target_short)
+                VALUES (?, ?, ?, ?, ?)
+            ''', edge_rows)
+
+            self._commit(conn)
 
     def load(self) -> List[ContextItem]:
         """Load all items from the database (used for graph export)."""
+        return list(self.iter_items())
+
+    def iter_items(self) -> Iterator[ContextItem]:
+        """
+        Yield every item, converting rows as they are read from the cursor.
+
+        Unlike load(), neither the raw rows nor the items are held in a list,
+        so a pass over the whole index runs in constant memory.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM items')
-            rows = cursor.fetchall()
-            return [self._row_to_item(row) for row in rows]
+            for row in cursor:
+                yield self._row_to_item(row)
 
     def search_hybrid(
         self,
@@ -268,7 +552,8 @@ class SQLiteContextStore:
         Algorithm:
           1. FTS5 search for keyword matches (fast, precise)
           2. Vector similarity search across all embeddings (slower, semantic)
-          3. Combine scores: score = (1-alpha)*FTS + alpha*vector
+          3. Combine scores: score = (1-alpha)*FTS + alpha*vector, with the
+             FTS score exp(best bm25 - bm25) in (0, 1] (1 for the best match)
           4. Return top results sorted by combined score
 
         Args:
@@ -284,73 +569,101 @@ class SQLiteContextStore:
             # Phase 1: FTS candidate retrieval
             clean_query = self._sanitize_fts_query(query_text)
 
+            # id -> normalized BM25 score, best match first. bm25() is negative
+            # and lower is better, so exp(best - s) maps the best hit to 1.0.
+            # type_filter applies here too, so hits of other types neither
+            # reach the results nor use up the candidate slots.
             fts_candidates = {}
             try:
-                cursor.execute('''
-                    SELECT id, rank FROM items_fts WHERE items_fts MATCH ? ORDER BY rank LIMIT 100
-                ''', (clean_query,))
-                for row in cursor.fetchall():
-                    fts_candidates[row[0]] = row[1]
+                if type_filter:
+                    cursor.execute('''
+                        SELECT items.id, bm25(items_fts) AS s
+                        FROM items_fts
+                        JOIN items ON items.rowid = items_fts.rowid
+                        WHERE items_fts MATCH ? AND +json_extract(items.metadata, '$.type') = ?
+                        ORDER BY s LIMIT 100
+                    ''', (clean_query, type_filter))
+                else:
+                    cursor.execute('''
+                        SELECT id, bm25(items_fts) AS s FROM items_fts WHERE items_fts MATCH ? ORDER BY s LIMIT 100
+                    ''', (clean_query,))
+                rows = cursor.fetchall()
+                if rows:
+                    best = rows[0][1]
+                    for item_id, bm25_score in rows:
+                        fts_candidates[item_id] = math.exp(best - bm25_score)
             except sqlite3.OperationalError:
                 pass
 
             # Phase 2: Vector similarity (brute force - fine for small codebases)
-            vector_scores = {}
+            vector_hits = None
             if query_embedding:
                 np = _get_numpy()
-                if type_filter:
-                    cursor.execute(
-                        "SELECT id, embedding FROM items WHERE embedding IS NOT NULL AND metadata LIKE ?",
-                        (f'%"type": "{type_filter}"%',)
-                    )
-                else:
-                    cursor.execute('SELECT id, embedding FROM items WHERE embedding IS NOT NULL')
-                rows = cursor.fetchall()
-
-                if rows:
-                    ids = []
-                    vectors = []
-                    for r_id, r_blob in rows:
-                        ids.append(r_id)
-                        vectors.append(np.frombuffer(r_blob, dtype=np.float32))
-
-                    if vectors:
-                        matrix = np.vstack(vectors)
-                        q_vec = np.array(query_embedding, dtype=np.float32)
-
-                        # Compute cosine similarity: dot(A, B) / (||A|| * ||B||)
-                        norm_matrix = np.linalg.norm(matrix, axis=1)
-                        norm_q = np.linalg.norm(q_vec)
-
-                        if norm_q > 1e-10 and np.any(norm_matrix > 1e-10):
-                            safe_norm_matrix = np.where(norm_matrix < 1e-10, 1.0, norm_matrix)
-                            scores = np.dot(matrix, q_vec) / (safe_norm_matrix * norm_q)
-                            scores = np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0)
-                            for i, score in enumerate(scores):
-                                vector_scores[ids[i]] = float(score)
+                vectors = self._load_vector_matrix(cursor)
+                if vectors is not None:
+                    ids, positions, types, matrix, nonzero = vectors
+                    selected = types == type_filter if type_filter else np.ones(len(ids), dtype=bool)
+                    q_vec = np.array(query_embedding, dtype=np.float32)
+                    norm_q = np.linalg.norm(q_vec)
+
+                    if len(q_vec) != matrix.shape[1]:
+                        logger.warning(
+                            f"Query embedding has dimension {len(q_vec)}, the index {matrix.shape[1]}; "
+                            "using keyword search only"
+                        )
+                    # Rows are unit length already, so cosine similarity is a
+                    # single matrix-vector product with the normalized query
+                    elif norm_q > 1e-10 and np.any(nonzero[selected]):
+                        q_unit = q_vec / norm_q
+                        if _simsimd is not None:
+                            distances = _simsimd.cdist(q_unit[np.newaxis, :], matrix, metric="cosine")
+                            # Zero rows score 0, as in the product below
+                            scores = np.where(nonzero, 1.0 - np.asarray(distances, dtype=np.float32).ravel(), 0.0)
+                        else:
+                            scores = matrix @ q_unit
+                        scores = np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0)
+                        vector_hits = (ids, positions, selected, scores)
 
             # Phase 3: Score fusion
-            all_ids = set(fts_candidates.keys()) | set(vector_scores.keys())
-            final_scores = []
-
-            for item_id in all_ids:
-                fts_score = 1.0 if item_id in fts_candidates else 0.0
-                vec_score = vector_scores.get(item_id, 0.0)
-
-                effective_alpha = alpha if query_embedding else 0.0
-                score = ((1 - effective_alpha) * fts_score) + (effective_alpha * vec_score)
-                final_scores.append((item_id, score))
-
-            final_scores.sort(key=lambda x: x[1], reverse=True)
-            top_ids = [x[0] for x in final_scores[:limit]]
+            effective_alpha = alpha if query_embedding else 0.0
+            fts_weight = 1 - effective_alpha
+            top_ids = []
+            if vector_hits is None:
+                # Keyword hits only: the FTS order is already the score order
+                top_ids = list(fts_candidates)[:limit]
+            else:
+                # One array over the matrix rows: alpha * cosine for rows passing
+                # the type filter, plus the weighted BM25 score for FTS hits; rows
+                # that are neither are not candidates. FTS hits without an
+                # embedding follow with their weighted BM25 score alone.
+                ids, positions, selected, scores = vector_hits
+                keyword = np.zeros(len(ids), dtype=np.float32)
+                matched = np.zeros(len(ids), dtype=bool)
+                unembedded = []
+                unembedded_scores = []
+                for item_id, fts_score in fts_candidates.items():
+                    position = positions.get(item_id)
+                    if position is None:
+                        unembedded.append(item_id)
+                        unembedded_scores.append(fts_score)
+                    else:
+                        keyword[position] = fts_score
+                        matched[position] = True
+                hybrid = np.where(selected, effective_alpha * scores, 0.0) + fts_weight * keyword
+                hybrid[~(selected | matched)] = -np.inf
+                hybrid = np.concatenate([hybrid, fts_weight * np.array(unembedded_scores, dtype=np.float32)])
+
+                # O(N) top-k selection; only the k winners are sorted
+                count = min(limit, int(np.isfinite(hybrid).sum()))
+                if count > 0:
+                    top = np.argpartition(-hybrid, count - 1)[:count]
+                    top = top[np.argsort(-hybrid[top], kind='stable')]
+                    top_ids = [ids[i] if i < len(ids) else unembedded[i - len(ids)] for i in top]
 
             # Phase 4: Fetch full items (preserving ranked order)
             results = []
             if top_ids:
-                placeholders = ','.join(['?'] * len(top_ids))
-                cursor.execute(f'SELECT * FROM items WHERE id IN ({placeholders})', top_ids)
-                rows = cursor.fetchall()
-                row_map = {row[0]: row for row in rows}
+                row_map = {row[0]: row for row in self._select_in(cursor, 'SELECT * FROM items WHERE id IN ({})', top_ids)}
 
                 for item_id in top_ids:
                     if item_id in row_map:
@@ -358,6 +671,83 @@ class SQLiteContextStore:
 
             return results
 
+    def _load_vector_matrix(self, cursor: sqlite3.Cursor) -> Optional[Tuple]:
+        """
+        Return (ids, positions, types, matrix, nonzero) for every stored
+        embedding, or None.
+
+        matrix holds one L2-normalized float32 row per id (int8 rows widened
+        by their scale; near-zero rows left as they are and flagged False in
+        nonzero), positions maps each id to its row, and types holds the
+        matching metadata "type" values. Rows of another dimension than the
+        first (left by a different embedding model) are skipped with a warning.
+
+        Within a `with store:` block it is built once per data version (which
+        every write moves) and cached, so queries skip the BLOB decoding and norms.
+        """
+        version = self.get_data_version()
+        cached = self._vector_cache.get(self.db_path)
+        if cached is not None and cached[0] == version:
+            self._vector_cache.move_to_end(self.db_path)
+            return cached[1:]
+
+        np = _get_numpy()
+        cursor.execute('SELECT COUNT(*) FROM items WHERE embedding IS NOT NULL')
+        capacity = cursor.fetchone()[0]
+        if not capacity:
+            return None
+
+        # Rows are decoded straight into one preallocated matrix as the cursor
+        # streams them, so neither all the BLOBs nor per-row arrays are held
+        cursor.execute('''
+            SELECT id, json_extract(metadata, '$.type'), embedding, embedding_scale
+            FROM items WHERE embedding IS NOT NULL
+        ''')
+        ids = []
+        types = []
+        matrix = None
+        mismatched = 0
+        for r_id, r_type, r_blob, r_scale in cursor:
+            row = np.frombuffer(r_blob, dtype=np.float32 if r_scale is None else np.int8)
+            if matrix is None:
+                matrix = np.empty((capacity, len(row)), dtype=np.float32)
+            elif len(ids) == capacity:
+                # Rows committed since the count: the next version reloads them
+                break
+            if len(row) != matrix.shape[1]:
+                # Written by another embedding model: not comparable with the rest
+                mismatched += 1
+                continue
+            matrix[len(ids)] = row
+            if r_scale is not None:
+                matrix[len(ids)] *= np.float32(r_scale)
+            ids.append(r_id)
+            types.append(r_type)
+        if mismatched:
+            logger.warning(
+                f"Skipped {mismatched} embeddings whose dimension differs from {matrix.shape[1]}; "
+                "re-index with --semantic to rebuild them"
+            )
+        if not ids:
+            return None
+
+        matrix = matrix[:len(ids)]
+        norms = np.linalg.norm(matrix, axis=1)
+        nonzero = norms > 1e-10
+        matrix /= np.where(nonzero, norms, 1.0)[:, np.newaxis]
+        positions = {item_id: i for i, item_id in enumerate(ids)}
+        entry = (ids, positions, np.array(types, dtype=object), matrix, nonzero)
+
+        if self._conn is None:
+            # The version never repeats outside a with-block
+            return entry
+        cache = self._vector_cache
+        cache[self.db_path] = (version,) + entry
+        cache.move_to_end(self.db_path)
+        if len(cache) > VECTOR_CACHE_SIZE:
+            cache.popitem(last=False)
+        return entry
+
     def query(self, query_text: str, type_filter: Optional[str] = None) -> List[ContextItem]:
         """
         Execute a full-text search query using FTS5 (with LIKE fallback).
@@ -367,39 +757,44 @@ class SQLiteContextStore:
             type_filter: Optional filter for "class", "function", or "file"
 
         Returns:
-            Matching ContextItems, ordered by importance score
+            Matching ContextItems, ordered by BM25 relevance (exact token matches
+            outrank prefix-only ones), ties broken by importance score
         """
         with self._get_connection() as conn:
             cursor = conn.cursor()
             clean_query = self._sanitize_fts_query(query_text)
 
             try:
-                # Apply type_filter at SQL level for efficiency
+                # Apply type_filter at SQL level for efficiency. The unary + keeps
+                # the planner on primary-key lookups of the (few) FTS hits rather
+                # than scanning idx_items_type for every item of that type.
                 if type_filter:
                     cursor.execute('''
-                        SELECT * FROM items
-                        WHERE id IN (
-                            SELECT id FROM items_fts WHERE items_fts MATCH ?
-                        ) AND metadata LIKE ?
-                        ORDER BY score DESC
-                    ''', (clean_query, f'%"type": "{type_filter}"%'))
+                        SELECT items.* FROM items_fts
+                        JOIN items ON items.rowid = items_fts.rowid
+                        WHERE items_fts MATCH ? AND +json_extract(items.metadata, '$.type') = ?
+                        ORDER BY items_fts.rank, items.score DESC
+                    ''', (clean_query, type_filter))
                 else:
                     cursor.execute('''
-                        SELECT * FROM items
-                        WHERE id IN (
-                            SELECT id FROM items_fts WHERE items_fts MATCH ?
-                        )
-                        ORDER BY score DESC
+                        SELECT items.* FROM items_fts
+                        JOIN items ON items.rowid = items_fts.rowid
+                        WHERE items_fts MATCH ?
+                        ORDER BY items_fts.rank, items.score DESC
                     ''', (clean_query,))
-            except sqlite3.OperationalError:
-                # Fallback to LIKE
+            except sqlite3.OperationalError as e:
+                # Fallback to LIKE, only when SQLite lacks FTS5 (no items_fts):
+                # sanitized queries always parse, so other errors are real
+                if "items_fts" not in str(e) and "fts5" not in str(e):
+                    raise
                 like_query = self._sanitize_like_query(query_text)
                 base_query = "SELECT * FROM items WHERE (content LIKE ? ESCAPE '\\' OR metadata LIKE ? ESCAPE '\\')"
                 params = [f"%{like_query}%", f"%{like_query}%"]
 
                 if type_filter:
-                    base_query += " AND metadata LIKE ? ESCAPE '\\'"
-                    params.append(f'%"type": "{type_filter}"%')
+                    # Matched as JSON, whatever the spacing of the serialized metadata
+                    base_query += " AND json_extract(metadata, '$.type') = ?"
+                    params.append(type_filter)
 
                 cursor.execute(base_query, params)
 
@@ -417,6 +812,7 @@ class SQLiteContextStore:
     def get_items_by_ids(self, item_ids: Iterable[str]) -> List[ContextItem]:
         """Batch fetch items by IDs - optimized to avoid N+1 queries.
         Accepts any iterable (list, set, tuple) to avoid unnecessary conversions.
+        Large ID sets are fetched in chunks of SQLITE_MAX_IN_PARAMS.
         """
         # Convert to tuple for SQL params (works with any iterable)
         ids_tuple = tuple(item_ids)
@@ -425,20 +821,28 @@ class SQLiteContextStore:
 
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            # Use parameterized query with IN clause
-            placeholders = ','.join(['?'] * len(ids_tuple))
-            cursor.execute(f'SELECT * FROM items WHERE id IN ({placeholders})', ids_tuple)
-            rows = cursor.fetchall()
+            rows = self._select_in(cursor, 'SELECT * FROM items WHERE id IN ({})', ids_tuple)
             return [self._row_to_item(row) for row in rows]
 
+    def _select_in(self, cursor: sqlite3.Cursor, sql: str, values: Sequence) -> Iterator[Tuple]:
+        """
+        Run sql, whose `IN ({})` takes the values as bound parameters, and
+        yield the rows. Values go in chunks of SQLITE_MAX_IN_PARAMS (one
+        statement each), so no list can exceed SQLite's host parameter limit.
+        """
+        for start in range(0, len(values), SQLITE_MAX_IN_PARAMS):
+            chunk = tuple(values[start:start + SQLITE_MAX_IN_PARAMS])
+            cursor.execute(sql.format(','.join('?' * len(chunk))), chunk)
+            yield from cursor.fetchall()
+
     def _row_to_item(self, row: Tuple) -> ContextItem:
         """
         Convert a database row tuple to a ContextItem object.
 
-        Row format: (id, layer, content, metadata_json, source_file, line_number, score, embedding)
+        Row format: (id, layer, content, metadata_json, source_file, line_number, score, embedding, embedding_scale, rowid)
         """
         try:
-            metadata = json.loads(row[3])
+            metadata = _json_loads(row[3])
         except json.JSONDecodeError:
             metadata = {}
         return ContextItem(
@@ -462,50 +866,71 @@ class SQLiteContextStore:
 
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            placeholders = ','.join(['?'] * len(source_ids))
-            cursor.execute(
-                f'SELECT source_id, target_key, target_id FROM edges WHERE source_id IN ({placeholders})',
-                source_ids
-            )
-            return cursor.fetchall()
+            return list(self._select_in(
+                cursor, 'SELECT source_id, target_key, target_id FROM edges WHERE source_id IN ({})', source_ids
+            ))
 
-    def get_items_by_name(self, names: Iterable[str]) -> List[ContextItem]:
+    def traverse_outbound(self, seed_ids: List[str], depth: int) -> List[ContextItem]:
         """
-        Lookup items by symbol name (fallback for unresolved edges).
+        Collect the items reachable from seed_ids in up to `depth` dependency hops.
 
-        This is slower than ID lookup because it scans metadata with LIKE.
-        Used when GraphLinker hasn't resolved an edge yet.
+        The breadth-first walk runs as one recursive CTE. Resolved edges are
+        followed by target_id; unresolved ones fall back to items named like
+        their target_short. Seeds are not returned. Items come in the order of
+        a layer-by-layer walk: nearest hops first, and within a hop the items
+        reached by id (sorted by id) before those reached only by name.
         """
-        names_list = list(names)
-        if not names_list:
+        if not seed_ids or depth < 1:
             return []
 
+        seeds_json = json.dumps(list(seed_ids))
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            # Each reach row is (item id, hop, 1 if reached by name): a hop's rank
+            # is 2 * hop + by_name, and every id keeps its lowest rank
+            cursor.execute('''
+                WITH RECURSIVE reach(id, d, by_name) AS (
+                    SELECT value, 0, 0 FROM json_each(?)
+                    UNION
+                    SELECT coalesce(e.target_id, named.id), r.d + 1, e.target_id IS NULL
+                    FROM reach r
+                    JOIN edges e ON e.source_id = r.id
+                    -- Unary +: see idx_items_name in _ensure_storage
+                    LEFT JOIN items named
+                        ON e.target_id IS NULL
+                        AND json_extract(named.metadata, '$.name') = +e.target_short
+                    WHERE r.d < ? AND coalesce(e.target_id, named.id) IS NOT NULL
+                )
+                SELECT i.*
+                FROM (
+                    SELECT id, MIN(2 * d + by_name) AS rank
+                    FROM reach
+                    WHERE id NOT IN (SELECT value FROM json_each(?))
+                    GROUP BY id
+                ) r
+                JOIN items i ON i.id = r.id
+                ORDER BY r.rank, CASE WHEN r.rank % 2 = 0 THEN i.id END, i.rowid
+            ''', (seeds_json, depth, seeds_json))
+            return [self._row_to_item(row) for row in cursor.fetchall()]
 
-            conditions = []
-            params = []
-            for name in names_list:
-                escaped_name = self._sanitize_like_query(name)
-                conditions.append("metadata LIKE ? ESCAPE '\\'")
-                params.append(f'%"name": "{escaped_name}"%')
-
-            if not conditions:
-                return []
-
-            query = f"SELECT * FROM items WHERE {' OR '.join(conditions)}"
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+    def get_items_by_name(self, names: Iterable[str]) -> List[ContextItem]:
+        """
+        Lookup items by exact symbol name (fallback for unresolved edges).
 
-            # Deduplicate (a symbol name might match multiple items)
-            seen_ids = set()
-            results = []
-            for row in rows:
-                if row[0] not in seen_ids:
-                    seen_ids.add(row[0])
-                    results.append(self._row_to_item(row))
+        Names are matched through the idx_items_name expression index, one
+        `IN (...)` query per SQLITE_MAX_IN_PARAMS names, never scanning metadata.
+        Items are returned once each, in table order within a chunk.
+        """
+        names_tuple = tuple(set(names))
+        if not names_tuple:
+            return []
 
-            return results
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            rows = self._select_in(
+                cursor, "SELECT * FROM items WHERE json_extract(metadata, '$.name') IN ({})", names_tuple
+            )
+            return [self._row_to_item(row) for row in rows]
 
     def get_inbound_edges(self, target_id: str) -> List[ContextItem]:
         """
@@ -520,10 +945,23 @@ class SQLiteContextStore:
                 FROM edges e
                 JOIN items i ON e.source_id = i.id
                 WHERE e.target_id = ?
+                ORDER BY e.rowid
             ''', (target_id,))
             rows = cursor.fetchall()
             return [self._row_to_item(row) for row in rows]
 
+    def get_inbound_edge_ids(self, target_id: str) -> List[str]:
+        """
+        Ids of the items that depend on the given target.
+
+        Answered from idx_edges_inbound alone: no item rows are read and no
+        metadata is parsed, for graph walks that only need the ids.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT source_id FROM edges WHERE target_id = ?', (target_id,))
+            return [row[0] for row in cursor]
+
     def get_cascade_dependents(
         self,
         target_id: str,
@@ -536,30 +974,31 @@ class SQLiteContextStore:
             Tuple of (direct_dependents, cascade_dependents)
             where cascade_dependents are items indirectly affected.
         """
-        direct = self.get_inbound_edges(target_id)
-        direct_ids = {item.id for item in direct}
+        with self:
+            direct = self.get_inbound_edges(target_id)
+            direct_ids = {item.id for item in direct}
 
-        # BFS for cascade
-        visited = {target_id} | direct_ids
-        current_layer = direct_ids
-        cascade = []
+            # BFS for cascade, over ids only; the items are fetched once at the end
+            visited = {target_id} | direct_ids
+            current_layer = direct_ids
+            cascade_ids = []
 
-        for depth in range(max_depth - 1):
-            if not current_layer:
-                break
+            for depth in range(max_depth - 1):
+                if not current_layer:
+                    break
 
-            next_layer = set()
-            for item_id in current_layer:
-                dependents = self.get_inbound_edges(item_id)
-                for dep in dependents:
-                    if dep.id not in visited:
-                        visited.add(dep.id)
-                        next_layer.add(dep.id)
-                        cascade.append(dep)
+                next_layer = set()
+                for item_id in current_layer:
+                    for dep_id in self.get_inbound_edge_ids(item_id):
+                        if dep_id not in visited:
+                            visited.add(dep_id)
+                            next_layer.add(dep_id)
+                            cascade_ids.append(dep_id)
 
-            current_layer = next_layer
+                current_layer = next_layer
 
-        return direct, cascade
+            by_id = {item.id: item for item in self.get_items_by_ids(cascade_ids)}
+            return direct, [by_id[item_id] for item_id in cascade_ids if item_id in by_id]
 
     def should_reindex(self, file_path: str, current_mtime: float) -> bool:
         """
@@ -579,6 +1018,25 @@ class SQLiteContextStore:
 
             return current_mtime != result[0]
 
+    def get_all_file_mtimes(self) -> Dict[str, float]:
+        """
+        Return path -> recorded modification time for every tracked file.
+
+        Lets a directory scan check each file against one in-memory dict, instead
+        of a should_reindex query per file.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT path, last_modified FROM tracked_files')
+            return dict(cursor.fetchall())
+
+    def get_file_content_hashes(self) -> Dict[str, bytes]:
+        """Return path -> content hash recorded at the last index, for files that have one."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT path, content_hash FROM tracked_files WHERE content_hash IS NOT NULL')
+            return dict(cursor.fetchall())
+
     def update_file_status(self, file_path: str, current_mtime: float) -> None:
         """Record that a file was indexed at the given modification time."""
         abs_path = os.path.abspath(file_path)
@@ -589,92 +1047,214 @@ class SQLiteContextStore:
                 INSERT OR REPLACE INTO tracked_files (path, last_modified)
                 VALUES (?, ?)
             ''', (abs_path, current_mtime))
-            conn.commit()
+            self._commit(conn)
 
-    def cleanup_deleted_files(self, current_files: List[str]) -> None:
+    def batch_update_file_status(self, statuses: List[Tuple[str, float, Optional[bytes]]]) -> None:
         """
-        Remove index entries for files that were deleted from disk.
+        Record many indexed files at once, in a single transaction (called by the CLI).
 
-        Called during directory indexing to keep the database in sync.
-        Also cleans up orphaned edges and FTS entries.
+        Each status is (path, mtime, content_hash); the hash lets a later index
+        skip a file whose mtime changed but whose content did not.
         """
-        current_files_set = set(os.path.abspath(f) for f in current_files)
+        if not statuses:
+            return
 
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO tracked_files (path, last_modified, content_hash)
+                VALUES (?, ?, ?)
+            ''', [(os.path.abspath(path), mtime, content_hash) for path, mtime, content_hash in statuses])
+            self._commit(conn)
 
-            cursor.execute('SELECT path FROM tracked_files')
-            tracked_paths = [r[0] for r in cursor.fetchall()]
+    def cleanup_deleted_files(self, current_files: Iterable[str]) -> None:
+        """
+        Remove index entries for files that were deleted from disk.
 
-            missing_files = [p for p in tracked_paths if p not in current_files_set]
+        Called during directory indexing to keep the database in sync.
+        The deleted items' edges and FTS entries go with them.
 
-            if missing_files:
-                for missing in missing_files:
-                    cursor.execute('DELETE FROM tracked_files WHERE path = ?', (missing,))
-                    cursor.execute('DELETE FROM items WHERE source_file = ?', (missing,))
+        The scanned paths go into a temp table (in memory, see temp_store), so
+        finding tracked files that are gone is one anti-join with a single query
+        plan however many files were scanned - no parameter limits, and no copy
+        of tracked_files in Python.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
 
-                cursor.execute('DELETE FROM edges WHERE source_id NOT IN (SELECT id FROM items)')
-                cursor.execute('DELETE FROM items_fts WHERE id NOT IN (SELECT id FROM items)')
+            cursor.execute('DROP TABLE IF EXISTS temp.scanned_files')
+            cursor.execute('DROP TABLE IF EXISTS temp.deleted_files')
+            cursor.execute('CREATE TEMP TABLE scanned_files (path TEXT PRIMARY KEY)')
+            cursor.execute('CREATE TEMP TABLE deleted_files (path TEXT PRIMARY KEY)')
+            try:
+                cursor.executemany(
+                    'INSERT OR IGNORE INTO temp.scanned_files (path) VALUES (?)',
+                    ((os.path.abspath(f),) for f in current_files)
+                )
+                cursor.execute('''
+                    INSERT INTO temp.deleted_files (path)
+                    SELECT path FROM tracked_files
+                    WHERE path NOT IN (SELECT path FROM temp.scanned_files)
+                ''')
+                deleted_count = cursor.rowcount
+
+                if deleted_count:
+                    # Edges (ON DELETE CASCADE) and FTS rows (items_ad trigger)
+                    # go with the items, by id, rather than by any orphan scan
+                    cursor.execute('DELETE FROM items WHERE source_file IN (SELECT path FROM temp.deleted_files)')
+                    cursor.execute('DELETE FROM tracked_files WHERE path IN (SELECT path FROM temp.deleted_files)')
+                    logger.info(f"Cleaned up {deleted_count} deleted files.")
+            except BaseException:
+                if not self._in_transaction:
+                    conn.rollback()
+                raise
+            finally:
+                cursor.execute('DROP TABLE IF EXISTS temp.scanned_files')
+                cursor.execute('DROP TABLE IF EXISTS temp.deleted_files')
 
-                conn.commit()
-                logger.info(f"Cleaned up {len(missing_files)} deleted files.")
+            # Also when nothing was deleted: the temp table inserts opened a
+            # transaction, which would otherwise stay open on a shared connection
+            self._commit(conn)
 
     def get_all_edges(self) -> List[Tuple[str, str, Optional[str], str]]:
         """Return all edges for graph export (Mermaid, visualization)."""
+        return list(self.iter_all_edges())
+
+    def iter_all_edges(self) -> Iterator[Tuple[str, str, Optional[str], str]]:
+        """Yield (source_id, target_key, target_id, relation_type) of every edge, streamed from the cursor."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT source_id, target_key, target_id, relation_type FROM edges')
-            return cursor.fetchall()
+            yield from cursor
 
-    def get_all_items_metadata(self) -> List[Tuple[str, str, str]]:
-        """Return lightweight item data for the linker's name resolution."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, metadata, source_file FROM items")
-            return cursor.fetchall()
+    def iter_linked_edges(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (source_id, target_id) of every edge resolved to an indexed item.
 
-    def get_unresolved_edges(self) -> List[Tuple[int, str]]:
-        """Return edges that haven't been linked to concrete IDs yet."""
+        For passes that only follow resolved links (e.g. the structure tool's
+        module graph): unresolved and external edges, usually most of the
+        table, are filtered out in SQL and rows are streamed from the cursor.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT rowid, target_key FROM edges WHERE target_id IS NULL")
-            return cursor.fetchall()
+            cursor.execute('SELECT source_id, target_id FROM edges WHERE target_id IS NOT NULL ORDER BY rowid')
+            yield from cursor
 
-    def batch_update_edge_targets(self, updates: List[Tuple[str, int]]) -> None:
-        """Bulk update resolved target_ids (called by GraphLinker)."""
-        if not updates:
-            return
+    def link_edges_by_name(
+        self,
+        changed_ids: Optional[Iterable[str]] = None,
+        changed_names: Optional[Iterable[Optional[str]]] = None
+    ) -> Tuple[int, List[str]]:
+        """
+        Resolve unresolved edges to the item named by their target_short (called by GraphLinker).
 
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.executemany("UPDATE edges SET target_id = ? WHERE rowid = ?", updates)
-            conn.commit()
+        All unresolved edges are processed, or with changed_ids given only those
+        from a changed item or whose short name is in changed_names. Among the
+        items with the edge's short name, the first indexed wins, unless the key
+        has a parent ("inventory.InventoryService") and a candidate's path
+        contains it ("inventory"), case-insensitively.
 
-    def batch_update_scores(self, scores: List[Tuple[float, str]]) -> None:
-        """Bulk update importance scores (called by GraphLinker)."""
-        if not scores:
-            return
+        Matching runs as one UPDATE with an indexed name lookup per edge, so no
+        item or edge rows are materialized in Python.
 
+        Returns:
+            (number of edges resolved, target_key of each processed edge left unresolved)
+        """
         with self._get_connection() as conn:
+            # Python's str.lower (Unicode-aware, unlike SQLite's lower()) and the
+            # key's parent component, lowercased: "a.inventory.Service" -> "inventory"
+            conn.create_function("py_lower", 1, str.lower, deterministic=True)
+            conn.create_function("link_fragment", 1, _link_fragment, deterministic=True)
             cursor = conn.cursor()
-            cursor.executemany("UPDATE items SET score = ? WHERE id = ?", scores)
-            conn.commit()
 
-    def get_indegree_counts(self) -> List[Tuple[str, int]]:
+            cursor.execute('DROP TABLE IF EXISTS temp.pending_edges')
+            cursor.execute('CREATE TEMP TABLE pending_edges (edge_rowid INTEGER PRIMARY KEY)')
+            try:
+                if changed_ids is None:
+                    cursor.execute('''
+                        INSERT INTO temp.pending_edges (edge_rowid)
+                        SELECT rowid FROM edges WHERE target_id IS NULL
+                    ''')
+                else:
+                    cursor.execute('DROP TABLE IF EXISTS temp.changed_ids')
+                    cursor.execute('DROP TABLE IF EXISTS temp.changed_names')
+                    cursor.execute('CREATE TEMP TABLE changed_ids (id TEXT PRIMARY KEY)')
+                    cursor.execute('CREATE TEMP TABLE changed_names (name TEXT PRIMARY KEY)')
+                    cursor.executemany('INSERT OR IGNORE INTO temp.changed_ids VALUES (?)', ((i,) for i in changed_ids))
+                    cursor.executemany(
+                        'INSERT OR IGNORE INTO temp.changed_names VALUES (?)',
+                        ((n,) for n in changed_names or () if n)
+                    )
+                    cursor.execute('''
+                        INSERT INTO temp.pending_edges (edge_rowid)
+                        SELECT rowid FROM edges
+                        WHERE target_id IS NULL
+                          AND (source_id IN (SELECT id FROM temp.changed_ids)
+                               OR target_short IN (SELECT name FROM temp.changed_names))
+                    ''')
+                    cursor.execute('DROP TABLE temp.changed_ids')
+                    cursor.execute('DROP TABLE temp.changed_names')
+
+                # Unary + on target_short in both name lookups: see idx_items_name
+                cursor.execute('''
+                    UPDATE edges SET target_id = (
+                        SELECT id FROM (
+                            SELECT items.id AS id, items.rowid AS item_rowid,
+                                   instr(py_lower(COALESCE(items.source_file, '')), link_fragment(edges.target_key)) > 0
+                                       AS path_match
+                            FROM items
+                            WHERE json_extract(items.metadata, '$.name') = +edges.target_short
+                        )
+                        ORDER BY path_match DESC, item_rowid
+                        LIMIT 1
+                    )
+                    WHERE edges.rowid IN (SELECT edge_rowid FROM temp.pending_edges)
+                      AND edges.target_short != ''
+                      AND EXISTS (
+                        SELECT 1 FROM items WHERE json_extract(items.metadata, '$.name') = +edges.target_short
+                      )
+                ''')
+                resolved_count = cursor.rowcount
+
+                cursor.execute('''
+                    SELECT edges.target_key FROM temp.pending_edges AS pending
+                    JOIN edges ON edges.rowid = pending.edge_rowid
+                    WHERE edges.target_id IS NULL
+                ''')
+                unresolved_keys = [row[0] for row in cursor]
+            finally:
+                cursor.execute('DROP TABLE IF EXISTS temp.pending_edges')
+
+            self._commit(conn)
+            return resolved_count, unresolved_keys
+
+    def update_indegree_scores(self) -> None:
         """
-        Count incoming edges per item for importance scoring.
+        Set each linked item's importance score to log(1 + in-degree) (called by GraphLinker).
 
-        Items with more dependents are considered more important.
+        Items with more dependents are considered more important. Counting,
+        the log and the update run as one statement inside SQLite, instead of
+        fetching every count and writing each score back separately. The
+        correlated subquery (rather than UPDATE ... FROM, SQLite 3.33+) keeps it
+        portable; each count is an index probe on edges.target_id.
         """
+        sql = '''
+            UPDATE items SET score = (
+                SELECT ln(1 + COUNT(*)) FROM edges WHERE edges.target_id = items.id
+            )
+            WHERE id IN (SELECT target_id FROM edges WHERE target_id IS NOT NULL)
+        '''
+
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT target_id, COUNT(*) as degree
-                FROM edges
-                WHERE target_id IS NOT NULL
-                GROUP BY target_id
-            ''')
-            return cursor.fetchall()
+            try:
+                conn.execute(sql)
+            except sqlite3.OperationalError as e:
+                if "no such function" not in str(e):
+                    raise
+                # SQLite built without its math functions: same log, from Python
+                conn.create_function("ln", 1, math.log, deterministic=True)
+                conn.execute(sql)
+            self._commit(conn)
 
     def get_graph_nodes(self, limit: Optional[int] = None, offset: int = 0) -> List[dict]:
         """
@@ -682,31 +1262,45 @@ class SQLiteContextStore:
 
         Returns lightweight dicts with just the fields needed for rendering,
         ordered by importance score. Supports pagination for large graphs.
+        The two metadata fields needed are read with SQLite's JSON1, so no
+        row's metadata is parsed in Python.
+        """
+        sql = """
+            SELECT id, json_extract(metadata, '$.name'), json_extract(metadata, '$.type')
+            FROM items ORDER BY score DESC
         """
         with self._get_connection() as conn:
             cursor = conn.cursor()
             if limit:
-                cursor.execute(
-                    'SELECT id, metadata FROM items ORDER BY score DESC LIMIT ? OFFSET ?',
-                    (limit, offset)
-                )
+                cursor.execute(sql + ' LIMIT ? OFFSET ?', (limit, offset))
             else:
-                cursor.execute('SELECT id, metadata FROM items ORDER BY score DESC')
+                cursor.execute(sql)
 
-            nodes = []
-            for row in cursor.fetchall():
-                item_id = row[0]
-                try:
-                    meta = json.loads(row[1])
-                except json.JSONDecodeError:
-                    meta = {}
-                nodes.append({
+            return [
+                {
                     "id": item_id,
-                    "label": meta.get("name", item_id.split(":")[-1]),
-                    "group": meta.get("type", "unknown"),
+                    "label": name if name is not None else item_id.split(":")[-1],
+                    "group": item_type if item_type is not None else "unknown",
                     "title": item_id
-                })
-            return nodes
+                }
+                for item_id, name, item_type in cursor
+            ]
+
+    def get_data_version(self) -> Tuple[int, int, int]:
+        """
+        Cheap marker that changes whenever the database is written.
+
+        PRAGMA data_version moves when another connection commits, but ignores
+        the connection's own commits and only compares on one connection. The
+        marker is therefore (connection serial, data_version, this process's
+        write count), read on the persistent connection of a `with store:`
+        block; outside one it never repeats, so nothing cached under it is reused.
+        """
+        writes = self._write_counts.get(self.db_path, 0)
+        if self._conn is None:
+            return (next(_CONNECTION_SERIALS), 0, writes)
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return (self._conn_serial, data_version, writes)
 
     def get_item_count(self) -> int:
         """Return total items in the index (for pagination info)."""
@@ -715,3 +1309,24 @@ class SQLiteContextStore:
             cursor.execute('SELECT COUNT(*) FROM items')
             result = cursor.fetchone()
             return result[0] if result else 0
+
+
+def _quantize_int8(vector: "np.ndarray") -> Tuple["np.ndarray", Optional[float]]:
+    """
+    Symmetric per-vector int8 quantization: (int8 values, scale) with
+    vector ~= values * scale. An all-zero vector stays float32 (scale None).
+    """
+    np = _get_numpy()
+    peak = float(np.abs(vector).max())
+    if peak == 0.0:
+        return vector, None
+    scale = peak / 127.0
+    return np.round(vector / scale).astype(np.int8), scale
+
+
+def _link_fragment(target_key: Optional[str]) -> Optional[str]:
+    """Lowercased parent component of a dotted key ("models.User" -> "models"), or None."""
+    if not target_key:
+        return None
+    key_parts = target_key.rsplit('.', 2)
+    return key_parts[-2].lower() if len(key_parts) > 1 else None
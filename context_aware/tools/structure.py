@@ -12,11 +12,16 @@ Output includes:
 """
 import json
 import os
+import re
 from collections import defaultdict
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
 
+from ..models.context_item import ContextItem
 from ..store.sqlite_store import SQLiteContextStore
 
+# Pre-compiled regex for the project name in pyproject.toml: matches `name = "foo"`
+_PYPROJECT_NAME_PATTERN: Pattern = re.compile(r'name\s*=\s*["\']([^"\']+)["\']')
+
 
 class StructureGenerator:
     """
@@ -30,6 +35,8 @@ class StructureGenerator:
 
     def __init__(self, store: SQLiteContextStore):
         self.store = store
+        # Directory -> module path; every item in a directory maps to the same one
+        self._module_cache: Dict[str, str] = {}
 
     def generate(self, compact: bool = False, inject_mode: bool = False) -> str:
         """
@@ -39,17 +46,16 @@ class StructureGenerator:
             compact: If True, produces a minimal output for context injection
             inject_mode: If True, omits headers for hook integration
         """
-        items = self.store.load()
+        summary = self._summarize(self.store.iter_items())
 
-        if not items:
+        if not summary['total_items']:
             if inject_mode:
                 return "No indexed items. Run `context_aware index .` first."
             return "## Project Structure\n\nNo indexed items found. Run `context_aware index .` to build the index."
 
-        # Analyze the indexed items
-        modules = self._group_by_module(items)
-        entry_points = self._find_entry_points(items)
-        module_deps = self._compute_module_dependencies(items)
+        modules = summary['modules']
+        entry_points = summary['entry_points']
+        module_deps = self._compute_module_dependencies(summary['id_to_module'])
 
         # Build output
         lines: List[str] = []
@@ -116,52 +122,83 @@ class StructureGenerator:
 
         # Statistics
         if not compact and not inject_mode:
-            total_items = len(items)
-            total_classes = sum(1 for i in items if i.metadata.get('type') == 'class')
-            total_functions = sum(1 for i in items if i.metadata.get('type') == 'function')
-            total_files = len(set(i.source_file for i in items if i.source_file))
-
             lines.append("### Statistics")
             lines.append("")
-            lines.append(f"- **Files indexed**: {total_files}")
-            lines.append(f"- **Classes**: {total_classes}")
-            lines.append(f"- **Functions**: {total_functions}")
-            lines.append(f"- **Total symbols**: {total_items}")
+            lines.append(f"- **Files indexed**: {len(summary['files'])}")
+            lines.append(f"- **Classes**: {summary['total_classes']}")
+            lines.append(f"- **Functions**: {summary['total_functions']}")
+            lines.append(f"- **Total symbols**: {summary['total_items']}")
 
         return "\n".join(lines)
 
-    def _group_by_module(self, items) -> Dict[str, dict]:
-        """Group items by their parent directory (module)."""
+    def _summarize(self, items: Iterable[ContextItem]) -> dict:
+        """
+        Collect everything generate() needs in one pass over the items.
+
+        Items are consumed as they stream from the store, so the index is
+        never held in memory as a list: only the per-module symbol names,
+        entry points, id -> module map and counts are kept.
+        """
         modules: Dict[str, dict] = defaultdict(lambda: {
             'classes': [],
             'functions': [],
             'files': set(),
             'total': 0
         })
+        entry_points: List[dict] = []
+        seen_entry_files: Set[str] = set()
+        id_to_module: Dict[str, str] = {}
+        files: Set[str] = set()
+        counts = {'class': 0, 'function': 0}
+        total_items = 0
 
         for item in items:
+            total_items += 1
+            item_type = item.metadata.get('type', 'unknown')
+            if item_type in counts:
+                counts[item_type] += 1
             if not item.source_file:
                 continue
 
-            # Get directory path relative to common root
-            dir_path = os.path.dirname(item.source_file)
-            module_name = self._normalize_module_path(dir_path)
-
-            if not module_name:
-                module_name = "."
-
-            item_type = item.metadata.get('type', 'unknown')
-            item_name = item.metadata.get('name', '')
-
-            modules[module_name]['files'].add(item.source_file)
-            modules[module_name]['total'] += 1
-
-            if item_type == 'class' and item_name:
-                modules[module_name]['classes'].append(item_name)
-            elif item_type == 'function' and item_name:
-                modules[module_name]['functions'].append(item_name)
-
-        return dict(modules)
+            files.add(item.source_file)
+            module_name = self._module_for_dir(os.path.dirname(item.source_file))
+            id_to_module[item.id] = module_name
+            self._add_to_module(modules[module_name], item, item_type)
+
+            # Entry points, deduplicated by file in first-seen order
+            entry_point = self._entry_point_for(item)
+            if entry_point and entry_point['file'] not in seen_entry_files:
+                seen_entry_files.add(entry_point['file'])
+                entry_points.append(entry_point)
+
+        return {
+            'modules': dict(modules),
+            'entry_points': entry_points,
+            'id_to_module': id_to_module,
+            'files': files,
+            'total_classes': counts['class'],
+            'total_functions': counts['function'],
+            'total_items': total_items,
+        }
+
+    def _add_to_module(self, module: dict, item: ContextItem, item_type: str) -> None:
+        """Count an item in its module (parent directory) and record its symbol name."""
+        item_name = item.metadata.get('name', '')
+
+        module['files'].add(item.source_file)
+        module['total'] += 1
+
+        if item_type == 'class' and item_name:
+            module['classes'].append(item_name)
+        elif item_type == 'function' and item_name:
+            module['functions'].append(item_name)
+
+    def _module_for_dir(self, dir_path: str) -> str:
+        """Module path of a directory ("." for the root), computed once per directory."""
+        module = self._module_cache.get(dir_path)
+        if module is None:
+            module = self._module_cache[dir_path] = self._normalize_module_path(dir_path) or "."
+        return module
 
     def _normalize_module_path(self, dir_path: str) -> str:
         """Convert absolute path to relative module path."""
@@ -179,64 +216,41 @@ class StructureGenerator:
 
         return dir_path
 
-    def _find_entry_points(self, items) -> List[dict]:
-        """Identify likely entry points (main files, CLI, servers)."""
-        entry_points = []
-
-        for item in items:
-            if not item.source_file:
-                continue
-
-            content = item.content.lower()
-            file_name = os.path.basename(item.source_file)
-
-            # Heuristics for entry points
-            is_main = 'if __name__' in content or '__main__' in content
-            is_cli = 'argparse' in content or 'click' in content or 'typer' in content
-            is_server = 'app.run' in content or 'uvicorn' in content or 'fastapi' in content
-            is_main_file = file_name in ('main.py', 'cli.py', 'app.py', 'server.py', 'index.js', 'index.ts')
-
-            if is_main or is_cli or is_server or is_main_file:
-                desc = ""
-                if is_cli:
-                    desc = "→ CLI"
-                elif is_server:
-                    desc = "→ Server"
-                elif is_main:
-                    desc = "→ Main"
-
-                entry_points.append({
-                    'file': self._normalize_module_path(item.source_file),
-                    'description': desc
-                })
-
-        # Deduplicate by file
-        seen = set()
-        unique = []
-        for ep in entry_points:
-            if ep['file'] not in seen:
-                seen.add(ep['file'])
-                unique.append(ep)
-
-        return unique
-
-    def _compute_module_dependencies(self, items) -> Dict[str, Set[str]]:
-        """Build a simplified module-to-module dependency graph."""
-        edges = self.store.get_all_edges()
-
-        # Map item IDs to their modules
-        id_to_module: Dict[str, str] = {}
-        for item in items:
-            if item.source_file:
-                module = self._normalize_module_path(os.path.dirname(item.source_file))
-                id_to_module[item.id] = module if module else "."
-
-        # Aggregate edges at module level
+    def _entry_point_for(self, item: ContextItem) -> Optional[dict]:
+        """Entry point record if the item looks like one (main files, CLI, servers), else None."""
+        content = item.content.lower()
+        file_name = os.path.basename(item.source_file)
+
+        # Heuristics for entry points
+        is_main = 'if __name__' in content or '__main__' in content
+        is_cli = 'argparse' in content or 'click' in content or 'typer' in content
+        is_server = 'app.run' in content or 'uvicorn' in content or 'fastapi' in content
+        is_main_file = file_name in ('main.py', 'cli.py', 'app.py', 'server.py', 'index.js', 'index.ts')
+
+        if not (is_main or is_cli or is_server or is_main_file):
+            return None
+
+        desc = ""
+        if is_cli:
+            desc = "→ CLI"
+        elif is_server:
+            desc = "→ Server"
+        elif is_main:
+            desc = "→ Main"
+
+        return {
+            'file': self._normalize_module_path(item.source_file),
+            'description': desc
+        }
+
+    def _compute_module_dependencies(self, id_to_module: Dict[str, str]) -> Dict[str, Set[str]]:
+        """Build a simplified module-to-module dependency graph from the item id -> module map."""
+        # Aggregate edges at module level; only resolved edges can link two modules
         module_deps: Dict[str, Set[str]] = defaultdict(set)
 
-        for source_id, target_key, target_id, relation_type in edges:
+        for source_id, target_id in self.store.iter_linked_edges():
             source_module = id_to_module.get(source_id)
-            target_module = id_to_module.get(target_id) if target_id else None
+            target_module = id_to_module.get(target_id)
 
             if source_module and target_module and source_module != target_module:
                 module_deps[source_module].add(target_module)
@@ -263,16 +277,16 @@ class StructureGenerator:
 
                     if path.endswith('.toml'):
                         # Simple regex for name in pyproject.toml
-                        import re
-                        match = re.search(r'name\s*=\s*["\']([^"\']+)["\']', content)
+                        match = _PYPROJECT_NAME_PATTERN.search(content)
                         if match:
                             return match.group(1)
                     elif path.endswith('.json'):
                         data = json.loads(content)
-                        if 'name' in data:
+                        if isinstance(data, dict) and 'name' in data:
                             return data['name']
-                except Exception:
-                    pass
+                except (OSError, UnicodeDecodeError, ValueError):
+                    # Unreadable or malformed manifest: try the next candidate
+                    continue
 
         # Fallback: directory name
         return os.path.basename(root)
@@ -0,0 +1,99 @@
+"""Command line parsing and the index command's file discovery."""
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from context_aware.cli.main import _list_git_source_files, _scan_source_files, main
+
+
+class JobsArgumentTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def run_main(self, *argv: str):
+        """Run the CLI; returns (exit code, stderr)."""
+        stderr = io.StringIO()
+        with mock.patch.object(sys, "argv", ["context_aware", "--root", self.root, *argv]), \
+                contextlib.redirect_stderr(stderr):
+            try:
+                main()
+            except SystemExit as e:
+                return e.code, stderr.getvalue()
+        return 0, stderr.getvalue()
+
+    def test_jobs_below_one_is_a_usage_error(self):
+        for jobs in ("0", "-2", "many"):
+            code, _ = self.run_main("index", self.root, "--jobs", jobs)
+            self.assertEqual(code, 2, f"--jobs {jobs}")
+        # Rejected while parsing: no store was created
+        self.assertFalse(os.path.exists(os.path.join(self.root, ".context_aware")))
+
+        _, stderr = self.run_main("index", self.root, "-j", "0")
+        self.assertIn("argument --jobs/-j: must be at least 1, got 0", stderr)
+
+
+
+@unittest.skipUnless(shutil.which("git"), "git is required")
+class GitSourceFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for rel_path in (
+            "app.py", "pkg/models.py", "pkg/untracked.py", "pkg/notes.md",
+            "build/generated.py", "pkg/schema.gen.py", "node_modules/lib/index.js", ".venv/site.py",
+        ):
+            path = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("x = 1\n")
+        with open(os.path.join(self.root, ".gitignore"), "w") as f:
+            f.write("build/\n*.gen.py\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def git(self, *args: str) -> None:
+        subprocess.run(["git", "-C", self.root, *args], check=True, capture_output=True)
+
+    def paths(self, files):
+        return sorted(os.path.relpath(path, self.root) for path, _ in files)
+
+    def test_lists_tracked_and_untracked_files_git_does_not_ignore(self):
+        self.git("init", "-q")
+        self.git("add", "app.py", "pkg/models.py", "node_modules", ".venv")
+        self.assertEqual(
+            self.paths(_list_git_source_files(self.root)), ["app.py", "pkg/models.py", "pkg/untracked.py"]
+        )
+        # The directory scan only knows the hidden and skipped directories
+        self.assertEqual(self.paths(_scan_source_files(self.root)), [
+            "app.py", "build/generated.py", "pkg/models.py", "pkg/schema.gen.py", "pkg/untracked.py"
+        ])
+
+    def test_falls_back_outside_a_git_root(self):
+        self.assertIsNone(_list_git_source_files(self.root))
+        # A subdirectory of a work tree is scanned, not listed
+        self.git("init", "-q")
+        self.assertIsNone(_list_git_source_files(os.path.join(self.root, "pkg")))
+
+    def test_falls_back_when_git_fails_or_is_missing(self):
+        # Not a repository git can read
+        with open(os.path.join(self.root, ".git"), "w") as f:
+            f.write("gitdir: missing\n")
+        self.assertIsNone(_list_git_source_files(self.root))
+
+        os.remove(os.path.join(self.root, ".git"))
+        self.git("init", "-q")
+        with mock.patch.dict(os.environ, {"PATH": os.path.join(self.root, "pkg")}):
+            self.assertIsNone(_list_git_source_files(self.root))
+
+
+if __name__ == "__main__":
+    unittest.main()
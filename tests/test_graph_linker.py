@@ -0,0 +1,164 @@
+"""Edge resolution in SQLite against the Python resolver it replaced."""
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from typing import Dict, List, Optional, Tuple
+
+from context_aware.linker.graph_linker import GraphLinker
+from context_aware.models.context_item import ContextItem, ContextLayer
+from context_aware.store.sqlite_store import SQLiteContextStore
+
+
+def python_resolve(conn: sqlite3.Connection) -> Dict[int, Optional[str]]:
+    """The linker's former loop: edge rowid -> target id for every unresolved edge."""
+    name_map: Dict[str, List[Tuple[str, str]]] = {}
+    for item_id, name, source_file in conn.execute(
+        "SELECT id, json_extract(metadata, '$.name'), source_file FROM items ORDER BY rowid"
+    ):
+        if name:
+            name_map.setdefault(name, []).append((item_id, source_file or ""))
+
+    targets = {}
+    for rowid, target_key in conn.execute("SELECT rowid, target_key FROM edges WHERE target_id IS NULL"):
+        targets[rowid] = None
+        if not target_key:
+            continue
+        key_parts = target_key.rsplit('.', 2)
+        candidates = name_map.get(key_parts[-1])
+        if not candidates:
+            continue
+        if len(candidates) > 1 and len(key_parts) > 1:
+            path_fragment = key_parts[-2].lower()
+            for cid, cpath in candidates:
+                if path_fragment in cpath.lower():
+                    targets[rowid] = cid
+                    break
+        if targets[rowid] is None:
+            targets[rowid] = candidates[0][0]
+    return targets
+
+
+class LinkerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = SQLiteContextStore(root_dir=self.root)
+        self.save("class:billing/service.py:Service", "Service", "billing/service.py")
+        self.save("class:Inventory/service.py:Service", "Service", "Inventory/service.py")
+        self.save("function:utils.py:helper", "helper", "utils.py")
+        # A nameless item must not match keys whose short name is empty
+        self.save("file:empty.py:", "", "empty.py")
+        self.save("function:app.py:main", "main", "app.py", [
+            "Service",               # same name twice, no path: first indexed
+            "inventory.Service",     # path fragment matches case-insensitively
+            "billing.Service",
+            "shipping.Service",      # fragment matches neither: first indexed
+            "a.inventory.helper",    # single candidate, fragment ignored
+            "os.path",               # no candidate
+            "models.",               # empty target_short
+        ])
+        conn = self.connect()
+        try:
+            conn.execute("INSERT INTO edges VALUES ('function:app.py:main', '', NULL, 'import', '')")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.store.db_path)
+
+    def save(self, item_id: str, name: str, path: str, dependencies: Optional[List[str]] = None) -> None:
+        self.store.save([ContextItem(
+            id=item_id,
+            layer=ContextLayer.SEMANTIC,
+            content=item_id,
+            metadata={"type": item_id.split(":")[0], "name": name, "dependencies": dependencies or []},
+            source_file=os.path.join(self.root, path),
+            line_number=1,
+        )])
+
+    def expected_targets(self) -> Dict[int, Optional[str]]:
+        conn = self.connect()
+        try:
+            return python_resolve(conn)
+        finally:
+            conn.close()
+
+    def targets(self, rowids) -> Dict[int, Optional[str]]:
+        conn = self.connect()
+        try:
+            return {rowid: conn.execute("SELECT target_id FROM edges WHERE rowid = ?", (rowid,)).fetchone()[0] for rowid in rowids}
+        finally:
+            conn.close()
+
+
+class LinkEdgesByNameTest(LinkerTestCase):
+    def test_full_link_matches_python_resolver(self):
+        expected = self.expected_targets()
+        resolved_count, unresolved_keys = self.store.link_edges_by_name()
+
+        self.assertEqual(self.targets(expected), expected)
+        self.assertEqual(resolved_count, 5)
+        self.assertEqual(sorted(unresolved_keys), ["", "models.", "os.path"])
+        conn = self.connect()
+        try:
+            by_key = dict(conn.execute("SELECT target_key, target_id FROM edges"))
+        finally:
+            conn.close()
+        self.assertEqual(by_key["Service"], "class:billing/service.py:Service")
+        self.assertEqual(by_key["inventory.Service"], "class:Inventory/service.py:Service")
+        self.assertEqual(by_key["shipping.Service"], "class:billing/service.py:Service")
+
+    def test_incremental_link_matches_python_resolver(self):
+        self.save("function:app.py:route", "route", "app.py", ["tracking.Tracker"])
+        self.store.link_edges_by_name()
+
+        # Indexed later: resolves an edge of an unchanged item by its name, and
+        # brings an edge of its own that has no candidate
+        self.save("class:tracking/tracker.py:Tracker", "Tracker", "tracking/tracker.py", ["Missing"])
+        self.save("function:cli.py:run", "run", "cli.py", ["helper", "inventory.Service"])
+        expected = self.expected_targets()
+
+        resolved_count, unresolved_keys = self.store.link_edges_by_name(
+            changed_ids={"class:tracking/tracker.py:Tracker", "function:cli.py:run"},
+            changed_names={"Tracker", "run"}
+        )
+        self.assertEqual(self.targets(expected), expected)
+        self.assertEqual(resolved_count, 3)
+        # Unresolved edges of unchanged items ("os.path") are not revisited
+        self.assertEqual(unresolved_keys, ["Missing"])
+
+
+
+class GraphLinkerTest(LinkerTestCase):
+    def score(self, item_id: str) -> float:
+        conn = self.connect()
+        try:
+            return conn.execute("SELECT score FROM items WHERE id = ?", (item_id,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_link_without_changes_writes_nothing(self):
+        GraphLinker(self.store).link()
+        conn = self.connect()
+        try:
+            conn.execute("UPDATE items SET score = 42.0 WHERE id = 'function:utils.py:helper'")
+            conn.commit()
+        finally:
+            conn.close()
+
+        GraphLinker(self.store).link(changed_ids=set(), changed_names=set())
+        self.assertEqual(self.score("function:utils.py:helper"), 42.0)
+
+        # Re-saved items lost their scores: a link after them restores them
+        GraphLinker(self.store).link(changed_ids={"function:utils.py:helper"}, changed_names={"helper"})
+        self.assertAlmostEqual(self.score("function:utils.py:helper"), math.log(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""GraphRouter search caching against writes to the index."""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from context_aware.router.graph_router import GraphRouter
+from context_aware.store.sqlite_store import SQLiteContextStore
+
+from test_sqlite_store import make_item
+
+
+class RouteCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = SQLiteContextStore(root_dir=self.root)
+        self.source_file = os.path.join(self.root, "billing.py")
+        self.store.save([make_item("function:billing.py:charge", "function", "charge", "def charge(invoice)", self.source_file)])
+        self.router = GraphRouter(self.store)
+
+    def tearDown(self):
+        GraphRouter.clear_cache()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def route_ids(self):
+        return sorted(item.id for item in self.router.route("invoice"))
+
+    def test_write_through_the_store_invalidates_cached_routes(self):
+        with self.store:
+            self.assertEqual(self.route_ids(), ["function:billing.py:charge"])
+            self.store.save([make_item("class:billing.py:Invoice", "class", "Invoice", "class Invoice", self.source_file)])
+            self.assertEqual(self.route_ids(), ["class:billing.py:Invoice", "function:billing.py:charge"])
+
+    def test_commit_from_another_connection_invalidates_cached_routes(self):
+        with self.store:
+            self.assertEqual(self.route_ids(), ["function:billing.py:charge"])
+            conn = sqlite3.connect(self.store.db_path)
+            try:
+                conn.execute("DELETE FROM items WHERE id = 'function:billing.py:charge'")
+                conn.commit()
+            finally:
+                conn.close()
+            self.assertEqual(self.route_ids(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
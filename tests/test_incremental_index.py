@@ -0,0 +1,94 @@
+"""Incremental re-indexing keeps the graph state of files that did not change."""
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_index(root: str) -> str:
+    """Index root/src with the CLI; returns its log output."""
+    result = subprocess.run(
+        [sys.executable, "-m", "context_aware.cli.main", "--root", root, "index", os.path.join(root, "src")],
+        cwd=REPO_ROOT, check=True, capture_output=True
+    )
+    return result.stderr.decode()
+
+
+def write(path: str, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class IndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "src"))
+        self.helper_file = os.path.join(self.root, "src", "a.py")
+        # utils() has no dependencies of its own; its dependents live in b.py
+        write(self.helper_file, "def utils():\n    return 1\n")
+        write(
+            os.path.join(self.root, "src", "b.py"),
+            "from a import utils\nimport a.utils\n\ndef run():\n    return utils()\n"
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def score(self, item_id: str) -> float:
+        conn = sqlite3.connect(os.path.join(self.root, ".context_aware", "context.db"))
+        try:
+            return conn.execute("SELECT score FROM items WHERE id = ?", (item_id,)).fetchone()[0]
+        finally:
+            conn.close()
+
+
+class IncrementalScoreTest(IndexTestCase):
+    def test_touched_file_keeps_its_score(self):
+        run_index(self.root)
+        before = self.score("function:a.py:utils")
+        self.assertGreater(before, 0.0)
+
+        # Nothing is left to link after re-saving a.py, yet its score must be restored
+        time.sleep(0.01)
+        write(self.helper_file, "def utils():\n    return 2\n")
+        os.utime(self.helper_file, None)
+        run_index(self.root)
+
+        self.assertAlmostEqual(self.score("function:a.py:utils"), before)
+
+
+class ContentHashSkipTest(IndexTestCase):
+    def item_ids(self):
+        conn = sqlite3.connect(os.path.join(self.root, ".context_aware", "context.db"))
+        try:
+            return sorted(row[0] for row in conn.execute("SELECT id FROM items"))
+        finally:
+            conn.close()
+
+    def test_touched_file_is_skipped_and_edited_file_reindexed(self):
+        run_index(self.root)
+        caller_file = os.path.join(self.root, "src", "b.py")
+
+        # a.py only gets a new mtime; b.py gets new content
+        time.sleep(0.01)
+        os.utime(self.helper_file, None)
+        write(caller_file, "from a import utils\n\ndef run():\n    return utils()\n\ndef stop():\n    pass\n")
+        log = run_index(self.root)
+
+        self.assertIn("Found 2 changed files", log)
+        self.assertIn("Skipped 1 modified files with unchanged content.", log)
+        self.assertIn("function:b.py:stop", self.item_ids())
+        self.assertIn("function:a.py:utils", self.item_ids())
+
+        # The skipped file's new mtime was recorded: the next run does not read it
+        self.assertIn("Found 0 changed files", run_index(self.root))
+
+
+if __name__ == "__main__":
+    unittest.main()
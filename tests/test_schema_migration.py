@@ -0,0 +1,174 @@
+"""Opening a database written by an older release upgrades its schema in place."""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from context_aware.models.context_item import ContextItem, ContextLayer
+from context_aware.store.sqlite_store import SQLiteContextStore
+
+# The schema of the first release: no embedding_scale, no target_short or
+# ON DELETE CASCADE on edges, no content hashes and a self-contained FTS table
+LEGACY_SCHEMA = '''
+    CREATE TABLE items (
+        id TEXT PRIMARY KEY,
+        layer TEXT,
+        content TEXT,
+        metadata TEXT,
+        source_file TEXT,
+        line_number INTEGER,
+        score REAL DEFAULT 0,
+        embedding BLOB
+    );
+    CREATE TABLE edges (
+        source_id TEXT,
+        target_key TEXT,
+        target_id TEXT,
+        relation_type TEXT,
+        PRIMARY KEY (source_id, target_key, relation_type),
+        FOREIGN KEY(source_id) REFERENCES items(id)
+    );
+    CREATE TABLE tracked_files (
+        path TEXT PRIMARY KEY,
+        last_modified REAL
+    );
+    CREATE VIRTUAL TABLE items_fts USING fts5(id, content, metadata);
+'''
+
+
+class LegacyDatabaseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        storage_dir = os.path.join(self.root, ".context_aware")
+        os.makedirs(storage_dir)
+        self.db_path = os.path.join(storage_dir, "context.db")
+        self.models_file = os.path.join(self.root, "models.py")
+        self.views_file = os.path.join(self.root, "views.py")
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executescript(LEGACY_SCHEMA)
+            items = [
+                ("class:models.py:User", "class User", '{"type": "class", "name": "User"}', self.models_file),
+                ("function:views.py:show_user", "def show_user()", '{"type": "function", "name": "show_user"}', self.views_file),
+            ]
+            for item_id, content, metadata, source_file in items:
+                conn.execute(
+                    "INSERT INTO items (id, layer, content, metadata, source_file, line_number) VALUES (?, 'semantic', ?, ?, ?, 1)",
+                    (item_id, content, metadata, source_file)
+                )
+                conn.execute("INSERT INTO items_fts (id, content, metadata) VALUES (?, ?, ?)", (item_id, content, metadata))
+            conn.executemany("INSERT INTO edges VALUES (?, ?, ?, 'import')", [
+                ("function:views.py:show_user", "models.User", "class:models.py:User"),
+                ("function:views.py:show_user", "os.path", None),
+                # Left behind by an item that no longer exists
+                ("function:views.py:deleted", "models.User", "class:models.py:User"),
+            ])
+            conn.executemany("INSERT INTO tracked_files VALUES (?, 1.0)", [(self.models_file,), (self.views_file,)])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def query(self, sql, params=()):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+
+class EdgesMigrationTest(LegacyDatabaseTestCase):
+    def test_edges_are_rebuilt_with_cascading_deletes(self):
+        with self.assertLogs("context_aware.store.sqlite_store", level="WARNING") as logs:
+            store = SQLiteContextStore(root_dir=self.root)
+        self.assertIn("Dropped 1 edges of missing items", "\n".join(logs.output))
+
+        self.assertEqual(self.query("SELECT source_id, target_key, target_id, target_short FROM edges ORDER BY target_key"), [
+            ("function:views.py:show_user", "models.User", "class:models.py:User", "User"),
+            ("function:views.py:show_user", "os.path", None, "path"),
+        ])
+        foreign_keys = self.query("PRAGMA foreign_key_list(edges)")
+        self.assertEqual([(fk[2], fk[6]) for fk in foreign_keys], [("items", "CASCADE")])
+
+        # views.py is gone: its item goes, and its edges with it
+        store.cleanup_deleted_files([self.models_file])
+        self.assertEqual(self.query("SELECT id FROM items"), [("class:models.py:User",)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM edges"), [(0,)])
+
+    def test_migrated_database_is_left_alone(self):
+        with self.assertLogs("context_aware.store.sqlite_store", level="WARNING"):
+            SQLiteContextStore(root_dir=self.root)
+        with self.assertNoLogs("context_aware.store.sqlite_store", level="WARNING"):
+            SQLiteContextStore(root_dir=self.root)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM edges"), [(2,)])
+
+
+class ItemsFtsMigrationTest(LegacyDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.assertLogs("context_aware.store.sqlite_store", level="WARNING"):
+            self.store = SQLiteContextStore(root_dir=self.root)
+
+    def search(self, text):
+        return sorted(item.id for item in self.store.query(text))
+
+    def check_fts_integrity(self):
+        # rank=1 compares the index against the items rows it points to
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("INSERT INTO items_fts (items_fts, rank) VALUES ('integrity-check', 1)")
+        finally:
+            conn.close()
+
+    def test_items_gain_a_rowid_column_keeping_their_rowids(self):
+        rowid_columns = [info for info in self.query("PRAGMA table_info(items)") if info[1] == "rowid"]
+        self.assertEqual([(info[2], info[5]) for info in rowid_columns], [("INTEGER", 1)])
+        self.assertEqual(self.query("SELECT rowid, id FROM items ORDER BY rowid"), [
+            (1, "class:models.py:User"), (2, "function:views.py:show_user")
+        ])
+        self.assertEqual(self.search("User"), ["class:models.py:User", "function:views.py:show_user"])
+        self.check_fts_integrity()
+
+    def test_triggers_keep_the_index_in_sync(self):
+        # Insert
+        self.store.save([ContextItem(
+            id="class:models.py:Account", layer=ContextLayer.SEMANTIC, content="class Account(Wallet)",
+            metadata={"type": "class", "name": "Account"}, source_file=self.models_file, line_number=5
+        )])
+        self.assertEqual(self.search("Wallet"), ["class:models.py:Account"])
+
+        # Update, in place and by replacing the row
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("UPDATE items SET content = 'class Member' WHERE id = 'class:models.py:User'")
+            conn.commit()
+        finally:
+            conn.close()
+        self.assertEqual(self.search("Member"), ["class:models.py:User"])
+        self.store.save([ContextItem(
+            id="class:models.py:Account", layer=ContextLayer.SEMANTIC, content="class Account(Ledger)",
+            metadata={"type": "class", "name": "Account"}, source_file=self.models_file, line_number=5
+        )])
+        self.assertEqual(self.search("Wallet"), [])
+        self.assertEqual(self.search("Ledger"), ["class:models.py:Account"])
+
+        # Delete, leaving a gap in the rowids that VACUUM must not close
+        self.store.cleanup_deleted_files([self.models_file])
+        self.assertEqual(self.search("show_user"), [])
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("DELETE FROM items WHERE id = 'class:models.py:User'")
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        self.assertEqual(self.search("Ledger"), ["class:models.py:Account"])
+        self.check_fts_integrity()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,286 @@
+"""SQLiteContextStore behaviour on a small hand-built index."""
+import math
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from context_aware.models.context_item import ContextItem, ContextLayer
+from context_aware.store.sqlite_store import SQLiteContextStore
+
+
+def make_item(item_id: str, item_type: str, name: str, content: str, source_file: str) -> ContextItem:
+    return ContextItem(
+        id=item_id,
+        layer=ContextLayer.SEMANTIC,
+        content=content,
+        metadata={"type": item_type, "name": name, "dependencies": []},
+        source_file=source_file,
+        line_number=1,
+    )
+
+
+class StoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = SQLiteContextStore(root_dir=self.root)
+        self.source_file = os.path.join(self.root, "service.py")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class CleanupTransactionTest(StoreTestCase):
+    def test_noop_cleanup_leaves_no_open_transaction(self):
+        self.store.save([make_item("function:service.py:run", "function", "run", "def run(): pass", self.source_file)])
+        self.store.batch_update_file_status([(self.source_file, 1.0, None)])
+
+        with self.store:
+            # Every tracked file still exists, so nothing is deleted
+            self.store.cleanup_deleted_files([self.source_file])
+            self.assertFalse(self.store._conn.in_transaction)
+
+            with self.store.transaction():
+                self.store.batch_update_file_status([(self.source_file, 2.0, None)])
+
+        self.assertEqual(self.store.get_all_file_mtimes(), {os.path.abspath(self.source_file): 2.0})
+
+
+class TraverseOutboundTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        # api -> service -> repo -> api (a cycle), service -> "db.Helper" left
+        # unresolved (two items share the name), api -> "Missing" matching
+        # nothing, one Helper -> model, and model -> service closes a second cycle
+        dependencies = {
+            "api": ["service", "Missing"],
+            "service": ["repo", "db.Helper"],
+            "repo": ["api"],
+            "Helper": ["model"],
+            "model": ["service"],
+            "unrelated": ["api"],
+        }
+        items = []
+        for name, deps in dependencies.items():
+            item = make_item(f"function:service.py:{name}", "function", name, f"def {name}()", self.source_file)
+            item.metadata["dependencies"] = deps
+            items.append(item)
+        items.append(make_item("class:other.py:Helper", "class", "Helper", "class Helper", self.source_file))
+        self.store.save(items)
+
+        with self.store:
+            for source, target_key in [
+                ("api", "service"), ("service", "repo"), ("repo", "api"), ("Helper", "model"), ("model", "service")
+            ]:
+                self.store._conn.execute(
+                    "UPDATE edges SET target_id = ? WHERE source_id = ? AND target_key = ?",
+                    (f"function:service.py:{target_key}", f"function:service.py:{source}", target_key)
+                )
+            self.store._conn.commit()
+
+    def reach(self, seeds, depth):
+        return [item.id for item in self.store.traverse_outbound([f"function:service.py:{s}" for s in seeds], depth)]
+
+    def test_depth_limits_the_walk(self):
+        self.assertEqual(self.reach(["api"], 0), [])
+        self.assertEqual(self.reach(["api"], 1), ["function:service.py:service"])
+        # Hop 2: by id, then the unresolved edge's fallback to both Helpers
+        self.assertEqual(self.reach(["api"], 2), [
+            "function:service.py:service", "function:service.py:repo",
+            "function:service.py:Helper", "class:other.py:Helper",
+        ])
+        self.assertEqual(self.reach(["api"], 3), [
+            "function:service.py:service", "function:service.py:repo",
+            "function:service.py:Helper", "class:other.py:Helper", "function:service.py:model",
+        ])
+
+    def test_cycles_end_the_walk_without_repeats(self):
+        self.assertEqual(self.reach(["api"], 50), self.reach(["api"], 3))
+        # Seeds are never returned, even when an edge leads back to one
+        self.assertEqual(self.reach(["api", "repo"], 50), [
+            "function:service.py:service",
+            "function:service.py:Helper", "class:other.py:Helper", "function:service.py:model",
+        ])
+
+    def test_unresolved_edges_fall_back_to_names(self):
+        self.assertEqual(self.reach(["service"], 1), [
+            "function:service.py:repo", "function:service.py:Helper", "class:other.py:Helper"
+        ])
+        # "Missing" names no item, so api's only hop is the resolved edge
+        self.assertEqual(self.reach(["api"], 1), ["function:service.py:service"])
+
+
+def top_level_sql(sql: str) -> str:
+    """sql with every parenthesized part (subqueries, argument lists) removed."""
+    while True:
+        stripped = re.sub(r"\([^()]*\)", "", sql)
+        if stripped == sql:
+            return sql
+        sql = stripped
+
+
+class IndegreeScoreTest(StoreTestCase):
+    def test_scores_are_log_of_one_plus_indegree(self):
+        dependencies = {
+            "Order": [],
+            "Money": [],
+            "Unused": [],
+            "checkout": ["Order", "Money"],
+            "refund": ["Order", "Money"],
+            # Two keys naming Order: two edges
+            "report": ["Order", "models.Order"],
+        }
+        items = []
+        for name, deps in dependencies.items():
+            item = make_item(f"class:service.py:{name}", "class", name, f"class {name}", self.source_file)
+            item.metadata["dependencies"] = deps
+            items.append(item)
+        self.store.save(items)
+        self.store.link_edges_by_name()
+
+        statements = []
+        with self.store:
+            self.store._conn.set_trace_callback(statements.append)
+            self.store.update_indegree_scores()
+            self.store._conn.set_trace_callback(None)
+
+        conn = sqlite3.connect(self.store.db_path)
+        try:
+            scores = dict(conn.execute("SELECT json_extract(metadata, '$.name'), score FROM items"))
+        finally:
+            conn.close()
+        for name, indegree in [("Order", 4), ("Money", 2), ("Unused", 0), ("checkout", 0)]:
+            self.assertAlmostEqual(scores[name], math.log(1 + indegree), msg=name)
+
+        # A correlated subquery, not UPDATE ... FROM (SQLite 3.33+)
+        updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn("FROM", top_level_sql(updates[0]).upper())
+
+
+@unittest.skipUnless(numpy is not None, "numpy is required for hybrid search")
+class HybridTypeFilterTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        embedded_class = make_item("class:service.py:Order", "class", "Order", "class Order", self.source_file)
+        embedded_class.embedding = [1.0, 0.0, 0.0]
+        embedded_function = make_item(
+            "function:service.py:order_total", "function", "order_total", "def order_total(order)", self.source_file
+        )
+        embedded_function.embedding = [0.9, 0.1, 0.0]
+        self.store.save([
+            embedded_class,
+            embedded_function,
+            # Keyword hits without an embedding, one of each type
+            make_item("class:service.py:OrderBook", "class", "OrderBook", "class OrderBook", self.source_file),
+            make_item("function:service.py:place_order", "function", "place_order", "def place_order(order)", self.source_file),
+        ])
+
+    def test_type_filter_applies_to_keyword_hits(self):
+        for query_embedding in ([1.0, 0.0, 0.0], None):
+            results = self.store.search_hybrid("order", query_embedding, type_filter="class")
+            self.assertEqual(
+                sorted(item.id for item in results),
+                ["class:service.py:Order", "class:service.py:OrderBook"],
+                f"query_embedding={query_embedding}"
+            )
+
+    def test_unfiltered_search_returns_every_type(self):
+        results = self.store.search_hybrid("order", [1.0, 0.0, 0.0])
+        self.assertEqual(len(results), 4)
+
+
+@unittest.skipUnless(numpy is not None, "numpy is required for hybrid search")
+class EmbeddingStorageTest(StoreTestCase):
+    def embedded(self, name: str, embedding):
+        item = make_item(f"function:service.py:{name}", "function", name, f"def {name}()", self.source_file)
+        item.embedding = embedding
+        return item
+
+    def stored(self, name: str):
+        conn = sqlite3.connect(self.store.db_path)
+        try:
+            return conn.execute(
+                "SELECT embedding, embedding_scale FROM items WHERE id = ?", (f"function:service.py:{name}",)
+            ).fetchone()
+        finally:
+            conn.close()
+
+    def test_int8_round_trip_uses_the_scale(self):
+        vector = [0.5, -1.25, 0.031, 2.0]
+        self.store.save([self.embedded("quantized", vector), self.embedded("zero", [0.0] * 4)], quantize_embeddings=True)
+
+        blob, scale = self.stored("quantized")
+        self.assertAlmostEqual(scale, 2.0 / 127)
+        values = numpy.frombuffer(blob, dtype=numpy.int8)
+        self.assertEqual(values.max(), 127)
+        numpy.testing.assert_allclose(values * scale, vector, atol=scale / 2)
+
+        # Nothing to scale: an all-zero vector stays float32
+        blob, scale = self.stored("zero")
+        self.assertIsNone(scale)
+        self.assertEqual(numpy.frombuffer(blob, dtype=numpy.float32).tolist(), [0.0] * 4)
+
+        # Search widens the int8 row by its scale before comparing
+        results = self.store.search_hybrid("unmatched", vector, alpha=1.0)
+        self.assertEqual(results[0].id, "function:service.py:quantized")
+
+    def test_embeddings_of_another_dimension_are_skipped(self):
+        self.store.save([self.embedded("first", [1.0, 0.0, 0.0]), self.embedded("second", [0.0, 1.0, 0.0])])
+        self.store.save([self.embedded("other_model", [1.0, 0.0])])
+
+        with self.assertLogs("context_aware.store.sqlite_store", level="WARNING") as logs:
+            results = self.store.search_hybrid("unmatched", [0.0, 1.0, 0.0])
+        self.assertIn("Skipped 1 embeddings whose dimension differs from 3", "\n".join(logs.output))
+        self.assertEqual(
+            [item.id for item in results], ["function:service.py:second", "function:service.py:first"]
+        )
+
+        # A query of another dimension finds no vectors to compare with
+        with self.assertLogs("context_aware.store.sqlite_store", level="WARNING"):
+            self.assertEqual(self.store.search_hybrid("unmatched", [1.0, 0.0]), [])
+
+
+@unittest.skipUnless(numpy is not None, "numpy is required for hybrid search")
+class VectorCacheTest(StoreTestCase):
+    def embedded(self, item_id: str, embedding):
+        item = make_item(item_id, "function", item_id.rpartition(":")[2], "def " + item_id, self.source_file)
+        item.embedding = embedding
+        return item
+
+    def nearest(self, query_embedding):
+        return self.store.search_hybrid("unmatched", query_embedding, limit=1)[0].id
+
+    def test_writes_reload_the_cached_matrix(self):
+        self.store.save([self.embedded("function:service.py:first", [1.0, 0.0, 0.0])])
+        with self.store:
+            self.assertEqual(self.nearest([0.0, 1.0, 0.0]), "function:service.py:first")
+
+            # Committed on the persistent connection: data_version stays put
+            self.store.save([self.embedded("function:service.py:second", [0.0, 1.0, 0.0])])
+            self.assertEqual(self.nearest([0.0, 1.0, 0.0]), "function:service.py:second")
+
+            # Not yet committed, but already visible to this connection
+            with self.store.transaction():
+                self.store.save([self.embedded("function:service.py:third", [0.0, 0.0, 1.0])])
+                self.assertEqual(self.nearest([0.0, 0.0, 1.0]), "function:service.py:third")
+
+            # Committed by another connection: only data_version moves
+            conn = sqlite3.connect(self.store.db_path)
+            try:
+                conn.execute("DELETE FROM items")
+                conn.commit()
+            finally:
+                conn.close()
+            self.assertEqual(self.store.search_hybrid("unmatched", [0.0, 0.0, 1.0]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()